@@ -16,9 +16,27 @@ import re
 import socket
 # import subprocess # Duplicate import removed
 import platform
+import sys
+import uuid
 from pathlib import Path
 import shlex # <-- Import shlex for Linux command quoting
 import git_operations # <-- Import the git operations module
+from file_operations import record_written_path, apply_changes_atomically
+from undo_journal import record_changes, new_turn_id, has_journal, load_journal, changed_since, undo_turn
+from process_operations import (run_robot_tests_cached, rerun_failed_tests, ensure_browser_pool,
+                                find_free_port, create_run_dir, finish_run_dir, latest_run_output)
+from robot_scheduling import format_schedule_report
+from robot_impact import plan_test_selection, format_selection_report, record_full_run
+from robot_results import format_results_markdown, format_rerun_report
+from robot_profiler import load_profile, format_profile_summary
+from config import (BROWSER_PROFILE, ROBOT_RERUN_RETRIES, MAX_CONCURRENT_PIPELINES,
+                    SESSION_WORKTREES, WORKTREE_MAX_AGE_HOURS)
+from pipeline import Pipeline, PIPELINE_SLOTS, acquire_pipeline_slot, format_timeline
+from worktrees import ensure_worktree, merge_back, prune_worktrees
+from resource_monitor import (ResourceMonitor, processes_with_arg, listening_pids, pool_owner_pids,
+                              stage_resource_stats, load_resource_history, record_resource_history,
+                              find_regressions, format_resource_report)
+from tracing import span, start_span, latest_trace, waterfall_chart
 
 # --- Configuration ---
 
@@ -48,6 +66,18 @@ if not PROJECT_ROOT.is_dir():
     st.error(f"🚨 Project Root Path not found or is not a directory: {PROJECT_ROOT_PATH}")
     st.warning("Please update the `PROJECT_ROOT_PATH` variable in the script.")
     st.stop()
+
+# 2a. Per-session worktree: edits, builds and tests of concurrent sessions stay apart
+MAIN_PROJECT_ROOT = PROJECT_ROOT
+WORKTREE_MESSAGE = None
+if SESSION_WORKTREES:
+    if "worktree_name" not in st.session_state:
+        st.session_state.worktree_name = f"session-{uuid.uuid4().hex[:8]}"
+        prune_worktrees(MAIN_PROJECT_ROOT, WORKTREE_MAX_AGE_HOURS, keep={st.session_state.worktree_name})
+    session_root, WORKTREE_MESSAGE = ensure_worktree(MAIN_PROJECT_ROOT, st.session_state.worktree_name)
+    if session_root:
+        PROJECT_ROOT = session_root
+        PROJECT_ROOT_PATH = str(session_root)
 # 2. Git Configuration
 GIT_REPO_URL = "https://github.com/bharath412/myautodev.git" # Replace if needed
 GIT_COMMIT_MESSAGE = "feat: AI-assisted code changes and test updates"# Define common source directories
@@ -65,7 +95,11 @@ if not full_robot_path.is_dir():
         st.info(f"Using relative Robot path: {full_robot_path}")
     else:
         st.warning(f"🚨 Robot Framework tests path not found at {ROBOT_TESTS_PATH_STR} or relative path {relative_robot_path_str}. 'run myapp' test execution will be skipped.")
-        # Not stopping the app, but warning the user.
+if PROJECT_ROOT != MAIN_PROJECT_ROOT and (PROJECT_ROOT / relative_robot_path_str).is_dir():
+    full_robot_path = PROJECT_ROOT / relative_robot_path_str  # The session's copy of the suite
+
+MAX_ROBOT_OUTPUT_TAIL = 2000 # Console characters kept in chat when a run produced no output.xml
+LIVE_LOG_CHARS = 4000 # Console characters shown live while Robot tests run
 
 # 4. Gemini Model Configuration
 MODEL_NAME = "gemini-1.5-pro-latest"
@@ -300,8 +334,8 @@ def parse_gemini_response(response_text):
     return parsed_data
 
 
-def write_changes_to_file(file_path_str, new_content):
-    """Writes the new content to the specified file, ensuring it's within the project."""
+def write_changes_to_file(file_path_str, new_content, turn=None):
+    """Writes the new content to the specified file, ensuring it's within the project. Old contents go to the undo journal of `turn`."""
     try:
         file_path = Path(file_path_str)
         # --- Security Check before writing ---
@@ -319,123 +353,15 @@ def write_changes_to_file(file_path_str, new_content):
              st.error(f"Security Error: Attempted to create directory outside project root: {parent_dir}")
              return False
 
+        before = file_path.read_bytes() if file_path.exists() else None
         file_path.write_text(new_content, encoding='utf-8')
+        record_changes([(file_path, before)], turn or new_turn_id())
+        record_written_path(file_path, PROJECT_ROOT)
         return True
     except Exception as e:
         st.error(f"Error writing changes to {file_path_str}: {e}")
         return False
 
-# --- Modified run_robot_tests function ---
-def run_robot_tests(test_path, cwd):
-    """
-    Runs Robot Framework tests. Returns: (success_bool, full_output_str)
-    """
-    # Ensure test_path is a Path object and exists
-    if not isinstance(test_path, Path):
-        test_path = Path(test_path)
-
-    if not test_path.exists():
-         err_msg = f"Robot test path does not exist: {test_path}"
-         st.error(err_msg)
-         return False, f"ERROR: {err_msg}"
-
-    # Security check on cwd
-    if not Path(cwd).resolve().is_relative_to(PROJECT_ROOT.resolve()):
-        err_msg = f"Security Error: Attempting to run tests outside project root CWD: {cwd}"
-        st.error(err_msg)
-        return False, f"ERROR: {err_msg}"
-
-
-    command = ["robot", str(test_path)]
-    st.info(f"Running Robot tests: `{' '.join(command)}` in `{cwd}`")
-    full_output = f"--- Robot Test Log: {' '.join(command)} ---\n\n"
-    process = None
-    success = False
-    try:
-        process = subprocess.Popen(
-            command,
-            cwd=cwd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT, # Combine stdout and stderr
-            text=True,
-            encoding='utf-8',
-            errors='replace', # Handle potential decoding errors
-            bufsize=1, # Line buffering
-            # Security: Consider adding resource limits if needed (platform dependent)
-        )
-
-        # Read output line by line and append to full_output
-        # Add a timeout mechanism to prevent hangs
-        output_lines = []
-        start_time = time.time()
-        MAX_TEST_TIME = 300 # 5 minutes timeout for tests
-
-        while True:
-             # Check for timeout
-             if time.time() - start_time > MAX_TEST_TIME:
-                  st.warning(f"Robot test execution timed out after {MAX_TEST_TIME} seconds.")
-                  if process.poll() is None: # If still running, try to terminate
-                       process.terminate()
-                       time.sleep(0.5)
-                       if process.poll() is None:
-                            process.kill()
-                  full_output += "\n\nERROR: Test execution timed out.\n"
-                  success = False
-                  break # Exit the reading loop
-
-
-             line = process.stdout.readline()
-             if not line and process.poll() is not None: # Process finished and no more output
-                 break
-             if line:
-                  output_lines.append(line)
-                  # Optional: Add a slight delay if output is too fast for Streamlit
-                  # time.sleep(0.01)
-
-             # Brief sleep if no line to avoid busy-waiting
-             if not line:
-                  time.sleep(0.1)
-
-
-        full_output += "".join(output_lines) # Append collected lines
-
-        # Ensure process has finished after loop (handles cases where readline might miss EOF before poll)
-        if process.poll() is None:
-            process.wait(timeout=5) # Wait a bit longer
-
-
-        return_code = process.returncode
-        success = return_code == 0
-        full_output += f"\n--- Test Execution {'Complete' if success else 'Failed'} (Exit Code: {return_code}) ---"
-
-        return success, full_output
-
-    except FileNotFoundError:
-        err_msg = "Error: 'robot' command not found. Is Robot Framework installed and in PATH?"
-        st.error(err_msg) # Show error immediately
-        full_output += f"\nERROR: {err_msg}"
-        return False, full_output
-    except subprocess.TimeoutExpired:
-         st.error("Robot test process timed out waiting for completion after output.")
-         full_output += "\n\nERROR: Process timed out after output reading."
-         return False, full_output
-    except Exception as e:
-        err_msg = f"An error occurred while running Robot tests: {e}"
-        st.error(err_msg) # Show error immediately
-        full_output += f"\nERROR: {err_msg}"
-        return False, full_output
-    finally:
-        # Ensure process is properly closed if it exists and is still running
-        if process and process.poll() is None:
-            try:
-                process.terminate()
-                time.sleep(0.5)
-                if process.poll() is None:
-                    process.kill()
-            except Exception as kill_e:
-                st.warning(f"Error terminating robot process: {kill_e}")
-
-
 # --- Functions for Running Processes (check_port, run_command_separate_terminal) ---
 def check_port(host="127.0.0.1", port=8081, retries=30, delay=2): #<-- Adjusted default port
     """Checks if a port is open and accepting connections."""
@@ -537,12 +463,200 @@ def run_command_separate_terminal(command_list, cwd):
         st.error(f"Failed to start command in new terminal: {e}")
         return False
 
+# --- run myapp pipeline ---
+def build_myapp_pipeline(run_flags, status_placeholder, live_log_placeholder, shared):
+    """
+    The `run myapp` steps as a dependency graph. Browser warm-up, test
+    selection and the remote fetch overlap the JVM start; pre-staging runs
+    alongside the tests. Commit/push needs green tests and deploy needs the
+    push. Each pipeline gets its own free port and Robot output directory so
+    several can run side by side. Results that must reach the chat from the
+    main thread (the Robot results message) are left in `shared`.
+    """
+    port_to_check = find_free_port() # This run's app instance; passed to mvn and Robot
+    run_dir = create_run_dir(port_to_check)
+    shared.update(port=port_to_check, run_dir=run_dir)
+    written_paths = st.session_state.setdefault("written_paths", set())  # Filled by write_changes_to_file
+    app_url = f"http://localhost:{port_to_check}"
+    pipeline = Pipeline()
+
+    def start_app(context):
+        started = run_command_separate_terminal(["mvn", "spring-boot:run", f"-Dserver.port={port_to_check}"], cwd=PROJECT_ROOT_PATH)
+        if not started:
+            return False, "* ❌ Failed to start Spring Boot app in a new terminal.\n"
+        return True, f"* ✅ Spring Boot app likely started on port {port_to_check} in new terminal (check for it!). **Remember to stop it manually.**\n"
+
+    def wait_for_port(context):
+        if not check_port(port=port_to_check, retries=30, delay=2):
+            return False, f"* ❌ Error: Port {port_to_check} did not become active. Skipping tests & Git.\n"
+        return True, f"* ✅ Port {port_to_check} is active.\n"
+
+    def warm_up_browser(context):
+        # Resolve (and cache) msedgedriver and start the browser pool while the JVM boots
+        md = ""
+        try:
+            resolved = subprocess.run([sys.executable, str(full_robot_path / "webdriver_setup.py"), "resolve"],
+                                      cwd=str(full_robot_path), capture_output=True, text=True, timeout=120)
+            if resolved.returncode == 0:
+                md += "* ✅ WebDriver resolved ahead of the tests.\n"
+            else:
+                md += "* ⚠️ WebDriver warm-up failed; the suite will resolve it itself.\n"
+        except (OSError, subprocess.TimeoutExpired) as e:
+            md += f"* ⚠️ WebDriver warm-up failed ({e}); the suite will resolve it itself.\n"
+        shared["pool_registry"] = ensure_browser_pool()
+        if shared["pool_registry"]:
+            md += "* ✅ Headless browser pool ready.\n"
+        return True, md
+
+    def select_tests(context):
+        robot_path_valid = isinstance(full_robot_path, Path) and full_robot_path.is_dir()
+        if not robot_path_valid:
+            return False, "* ⚠️ Warning: Robot test path not configured or found, skipping tests & Git.\n"
+        if "rerun" in run_flags:
+            shared["selection"] = {"mode": "rerun", "reason": "rerunning the failures of the last run", "tests": []}
+            return True, ""
+        # Pick the affected tests unless a full run was requested or is due
+        changed_paths = git_operations.get_changed_paths(PROJECT_ROOT)
+        shared["selection"] = plan_test_selection(full_robot_path, changed_paths, force_full="full" in run_flags)
+        return True, format_selection_report(shared["selection"])
+
+    def run_tests(context):
+        selection = shared["selection"]
+        if selection["mode"] == "none":
+            status_placeholder.info("No Robot tests are affected by the current changes. Skipping tests.")
+            return True, "* ⏭️ Robot tests skipped (type `run myapp full` to run the whole suite).\n"
+
+        status_placeholder.info("Running Robot Framework tests...") # Update status area
+        # Run tests (longest-first across shards) and get logs
+        test_names = list(selection["tests"]) if selection["mode"] == "subset" else None
+        # Lease pre-launched headless browsers when a pool is configured
+        robot_variables = {"BROWSER_PROFILE": BROWSER_PROFILE, "BASE_URL": app_url, "FRONTEND_URL": app_url}
+        if shared.get("pool_registry"):
+            robot_variables.update(USE_BROWSER_POOL=True, BROWSER_POOL_REGISTRY=shared["pool_registry"])
+        show_live_log = lambda tail: live_log_placeholder.code(tail[-LIVE_LOG_CHARS:], language="text")
+        if selection["mode"] == "rerun":
+            tests_succeeded, robot_output, run_report = rerun_failed_tests(
+                full_robot_path, PROJECT_ROOT_PATH, max(ROBOT_RERUN_RETRIES, 1),
+                on_output=show_live_log, variables=robot_variables, output_dir=run_dir,
+                previous_output=latest_run_output(exclude=run_dir) or Path(PROJECT_ROOT_PATH) / "output.xml")
+        else:
+            tests_succeeded, robot_output, run_report = run_robot_tests_cached(
+                full_robot_path, PROJECT_ROOT_PATH, test_names=test_names, force="force" in run_flags,
+                variables=robot_variables, retries=ROBOT_RERUN_RETRIES, on_output=show_live_log, output_dir=run_dir)
+        live_log_placeholder.empty()
+
+        md = ""
+        if run_report.get("cached"):
+            cached_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run_report["cached_at"]))
+            md += f"* ♻️ Reused cached Robot results from {cached_at} (inputs unchanged, key `{run_report['cache_key'][:12]}`). Type `run myapp force` to rerun.\n"
+        elif selection["mode"] != "rerun":
+            md += format_schedule_report(run_report)
+        md += format_rerun_report(run_report["results"], run_report.get("reruns", 0))
+        keyword_profile = load_profile(run_report["output_dir"])
+        if keyword_profile:
+            md += format_profile_summary(keyword_profile) + " (see keyword_profile.md)\n"
+        if selection["mode"] == "full" and tests_succeeded:
+            record_full_run()
+
+        # Add the per-test summary (not the raw console log) to history
+        results_md = format_results_markdown(run_report["results"], tests_succeeded, run_report["output_dir"], cached=run_report.get("cached", False))
+        if not run_report["results"]:
+            results_md += f"\n```\n{robot_output[-MAX_ROBOT_OUTPUT_TAIL:]}\n```"
+        shared["robot_message"] = {
+            "role": "assistant",
+            "type": "robot_results",
+            "content": results_md,
+            "results": run_report["results"],
+            "output_dir": run_report["output_dir"],
+        }
+        if tests_succeeded:
+            status_placeholder.success("Robot tests passed!")
+            return True, md + "* ✅ Robot tests completed successfully.\n"
+        status_placeholder.error("Robot tests failed.")
+        return False, md + "* ❌ Robot tests failed.\n"
+
+    def prestage_changes(context):
+        # Staging is not committing, so it can run while the tests decide the gate.
+        # Only files the agent wrote are staged; test output and screenshots stay out of commits.
+        output, ok = git_operations.stage_paths(PROJECT_ROOT, written_paths)
+        return ok, f"* ✅ Changes pre-staged during the test run: {output}\n" if ok else f"* ❌ Staging failed: {output}\n"
+
+    def fetch_remote(context):
+        # Only a head start for the commit step: when it fails, the commit checks the remote itself
+        output, shared["fetched"] = git_operations.fetch_remote(PROJECT_ROOT)
+        if shared["fetched"]:
+            return True, "* ✅ Fetched origin/main during the test run.\n"
+        return True, f"* ⚠️ git fetch failed ({output.strip()}); the commit step checks the remote itself.\n"
+
+    def commit_and_push(context):
+        committed_paths = set(written_paths)
+        in_worktree = PROJECT_ROOT != MAIN_PROJECT_ROOT
+        # The push is queued; the step returns once the commit (and a merge, if the remote moved) is done
+        success, message, push_job = git_operations.commit_and_push(PROJECT_ROOT, GIT_COMMIT_MESSAGE,
+                                                                    fetched=shared.get("fetched", False),
+                                                                    push_ref='HEAD:main' if in_worktree else 'main',
+                                                                    push_async=True)
+        md = f"* {'✅' if success else '❌'} Git: {message}\n"
+        if success:
+            written_paths.difference_update(committed_paths)
+            if push_job is not None:  # None when there was nothing to commit
+                shared["origin_push"] = push_job
+                shared.setdefault("push_jobs", []).append(push_job.id)
+        if success and in_worktree:
+            # Bring the main checkout (and its `main` branch, which Heroku deploys) up to the new commit
+            merged, merge_message = merge_back(MAIN_PROJECT_ROOT, PROJECT_ROOT)
+            md += f"* {'✅' if merged else '⚠️'} {merge_message}\n"
+        return success, md
+
+    def deploy(context):
+        # Runs after the queued origin push and is skipped if that push fails. A session worktree
+        # deploys its own HEAD (what was pushed to origin/main), not the local `main` branch,
+        # which is stale when merge_back could not fast-forward the main checkout.
+        ref = 'HEAD:main' if PROJECT_ROOT != MAIN_PROJECT_ROOT else 'main'
+        job = git_operations.queue_heroku_deploy(PROJECT_ROOT, ref, after=shared.get("origin_push"))
+        shared.setdefault("push_jobs", []).append(job.id)
+        return True, f"* ⏳ Heroku deployment queued (job {job.id}); completion is reported here when it finishes.\n"
+
+    pipeline.add("app", start_app, label="Start Spring Boot")
+    pipeline.add("browser", warm_up_browser, label="Warm up WebDriver/browser")
+    pipeline.add("select", select_tests, label="Select tests")
+    pipeline.add("fetch", fetch_remote, label="Fetch remote")
+    pipeline.add("port", wait_for_port, deps=["app"], label=f"Wait for port {port_to_check}")
+    pipeline.add("tests", run_tests, deps=["port", "browser", "select"], label="Robot tests")
+    pipeline.add("prestage", prestage_changes, deps=["select"], label="Pre-stage changes")
+    pipeline.add("commit", commit_and_push, deps=["tests", "prestage", "fetch"], label="Commit & push")
+    pipeline.add("deploy", deploy, deps=["commit"], label="Deploy to Heroku")
+    return pipeline
+
+def format_pipeline_summary(pipeline):
+    """Per-stage result lines in pipeline order"""
+    md = ""
+    for name, entry in pipeline.timeline.items():
+        if entry["status"] == "done":
+            md += pipeline.context[name]
+        elif entry["status"] == "failed":
+            message = entry["message"]
+            md += message if message.startswith("* ") else f"* ❌ {entry['label']} failed: {message}\n"
+        elif entry["status"] == "skipped":
+            md += f"* ⏭️ {entry['label']} skipped ({entry['message']}).\n"
+    return md
+
 # --- Streamlit App UI and Logic ---
 
 st.set_page_config(page_title="Code Assistant", layout="wide")
 st.title("🤖 Tech-AI Agent")
 st.success("Gemini - gemini-1.5-pro-latest AI initialised")
 #st.markdown(f"**Project Root:** `{PROJECT_ROOT}`")
+if SESSION_WORKTREES and PROJECT_ROOT == MAIN_PROJECT_ROOT:
+    st.warning(f"{WORKTREE_MESSAGE}; this session works in the shared checkout.")
+elif PROJECT_ROOT != MAIN_PROJECT_ROOT:
+    st.caption(f"Session worktree: `{PROJECT_ROOT}` (branch autodev/{st.session_state.worktree_name})")
+
+latest_trace_path, latest_trace_json = latest_trace("run myapp")
+if latest_trace_json:
+    with st.expander(f"⏱️ Trace of the latest run ({latest_trace_path.name})", expanded=False):
+        st.altair_chart(waterfall_chart(latest_trace_json), use_container_width=True)
+        st.caption(f"Open `{latest_trace_path}` in ui.perfetto.dev or chrome://tracing for thread lanes and span attributes.")
 # Display Robot path only if it was found and is a directory
 if 'full_robot_path' in locals() and isinstance(full_robot_path, Path) and full_robot_path.is_dir():
     st.markdown(f"")
@@ -552,7 +666,7 @@ else:
 st.markdown("""
 * Ask AI to analyze, modify, or **create** Java, HTML, CSS, JS, Robot, XML, etc. code.
 * Specify file names (e.g., `MyService.java`, `task.html`, `tests.robot`). **Use relative paths for clarity.**
-* Type `run myapp` to start Spring Boot app & run Robot tests (if configured). Git operations run if tests pass.
+* Type `run myapp` to start Spring Boot app & run the Robot tests affected by your changes (if configured); `run myapp full` runs the whole suite; add `force` to ignore cached results; `run myapp rerun` retries only the failures of the last run. Git operations run if tests pass (flaky tests that pass on a retry count as passed).
 * **Apply Changes:** Use button below code proposals (**CAUTION: Overwrites/Creates files!**).
 * **`run myapp` Note:** Starts app in a **new terminal**. **Stop it manually** (close window / Ctrl+C). Test & Git logs appear below.
 """)
@@ -593,6 +707,20 @@ if st.session_state.get("init_error"):
      st.stop()
 
 
+# --- Background pushes: report the ones that finished since the last rerun ---
+pending_push_jobs = []
+for job_id in list(st.session_state.get("push_jobs", [])):
+    job = git_operations.PUSH_QUEUE.get(job_id)
+    if job is None or job.done.is_set():
+        st.session_state.push_jobs.remove(job_id)
+        if job is not None:
+            st.session_state.messages.append({"role": "assistant", "content": git_operations.format_push_job(job)})
+    else:
+        pending_push_jobs.append(job)
+if pending_push_jobs:
+    st.info("⏳ Running in the background: " + ", ".join(f"{job.label} ({job.status}, {job.duration:.0f}s)" for job in pending_push_jobs))
+    st.button("Check background pushes")  # Any rerun reports finished jobs
+
 # --- Display Chat History ---
 # Display messages from history
 for i, message in enumerate(st.session_state.messages):
@@ -603,6 +731,7 @@ for i, message in enumerate(st.session_state.messages):
         # Check if this assistant message has code proposals
         proposals = message.get("code_proposals", [])  # Changed from code_proposal to code_proposals (list)
         if message["role"] == "assistant" and proposals:
+            turn_id = message.setdefault("turn_id", new_turn_id())  # Undo journal of the files this answer changes
             # Display each proposal with its own Apply button
             for proposal in proposals:
                 # Display code block
@@ -627,8 +756,9 @@ for i, message in enumerate(st.session_state.messages):
                                 button_key = f"apply_button_{i}_{hash(abs_path)}_{hash(proposal['code'])}"
 
                                 if st.button(button_label, key=button_key, type="primary"):
-                                    with st.spinner(f"{action_label} `{proposal['relative_path']}`..."):
-                                        success = write_changes_to_file(abs_path, proposal["code"])
+                                    with st.spinner(f"{action_label} `{proposal['relative_path']}`..."), \
+                                            span("apply change", root=True, path=proposal['relative_path']):
+                                        success = write_changes_to_file(abs_path, proposal["code"], turn_id)
 
                                     if success:
                                         result_verb = "created" if not file_exists else "applied"
@@ -641,6 +771,52 @@ for i, message in enumerate(st.session_state.messages):
                         else:
                             st.error("Cannot determine safe file path for this code. Cannot apply changes.")
 
+            # Several files: apply them together, all or nothing, with a single rerun
+            applicable = [p for p in proposals if p.get("absolute_path")]
+            if i == len(st.session_state.messages) - 1 and len(applicable) > 1:
+                if st.button(f"Apply all {len(applicable)} files", key=f"apply_all_{i}", type="primary"):
+                    with st.spinner(f"Applying {len(applicable)} files..."), \
+                            span("apply all", root=True, files=len(applicable)):
+                        success, apply_message = apply_changes_atomically(
+                            [(p["absolute_path"], p["code"]) for p in applicable], PROJECT_ROOT, turn_id)
+                    if success:
+                        st.success(f"{apply_message}: " + ", ".join(f"`{p['relative_path']}`" for p in applicable))
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.error(apply_message)
+
+            # Changes applied from this answer can be undone from the local journal, without git
+            if has_journal(turn_id):
+                confirm_key = f"undo_confirm_{turn_id}"
+                force = False
+                if st.session_state.get(confirm_key):
+                    # An earlier attempt found later edits to these files; undoing now discards them
+                    st.warning(st.session_state[confirm_key])
+                    force = st.button("↩️ Undo anyway, discarding the later edits", key=f"undo_force_{turn_id}")
+                if st.button("↩️ Undo changes from this answer", key=f"undo_{turn_id}"):
+                    changed = changed_since(turn_id)
+                    if changed:
+                        st.session_state[confirm_key] = ("These files changed after this answer was applied; undoing "
+                                                         "would discard those edits: "
+                                                         + ", ".join(f"`{Path(c).name}`" for c in changed))
+                        st.rerun()
+                    force = True  # Nothing changed since the answer was applied
+                if force:
+                    undo_paths = [entry["path"] for entry in (load_journal(turn_id) or {"files": []})["files"]]
+                    with span("undo turn", root=True, turn=turn_id):
+                        success, undo_message = undo_turn(turn_id, force=True)
+                    if success:
+                        st.session_state.pop(confirm_key, None)
+                        for undo_path in undo_paths:
+                            if Path(undo_path).is_relative_to(PROJECT_ROOT.resolve()):
+                                record_written_path(undo_path, PROJECT_ROOT)  # The next commit stages the restored files
+                        st.success(undo_message)
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.error(undo_message)
+
 # --- Chat Input and Processing ---
 if prompt := st.chat_input("Ask AI, or type 'run myapp'"):
     # Add user message to history
@@ -650,7 +826,9 @@ if prompt := st.chat_input("Ask AI, or type 'run myapp'"):
         st.markdown(prompt)
 
     # --- SPECIAL COMMAND: run myapp ---
-    if prompt.strip().lower() == "run myapp":
+    run_command = prompt.strip().lower().split()
+    run_flags = set(run_command[2:])
+    if run_command[:2] == ["run", "myapp"] and run_flags <= {"full", "force", "rerun"}:
         st.session_state.proposed_changes = None # Clear any pending proposals
         # Add messages to history as things happen
         # Use a single assistant message block for the whole sequence
@@ -659,93 +837,50 @@ if prompt := st.chat_input("Ask AI, or type 'run myapp'"):
             git_status_placeholder = st.empty() # Placeholder specifically for git status
 
             run_summary_md = "### MyApp Execution Sequence\n\n" # Start summary
-
-            # 1. Start Spring Boot
-            status_placeholder.info("Attempting to start Spring Boot app (`mvn spring-boot:run`) in a new terminal...")
-            started = run_command_separate_terminal(["mvn", "spring-boot:run", "-Dserver.port=8081"], cwd=PROJECT_ROOT_PATH) # Specify port
-
-            if not started:
-                status_placeholder.error("Failed to start Spring Boot app. Check console/try manually.")
-                run_summary_md += "* ❌ Failed to start Spring Boot app in a new terminal.\n"
-                # Append error message and stop 'run myapp' sequence here
-                st.session_state.messages.append({"role": "assistant", "content": run_summary_md})
-                st.rerun() # Rerun to show the failure message
-            else:
-                run_summary_md += "* ✅ Spring Boot app likely started in new terminal (check for it!). **Remember to stop it manually.**\n"
-                port_to_check = 8081 # Match the port in mvn command
-                status_placeholder.info(f"Waiting for port {port_to_check} to become active (up to 60s)...")
-                run_summary_md += f"* ⏳ Waiting for port {port_to_check}...\n"
-                # Update display immediately
-                status_placeholder.markdown(run_summary_md)
-
-                # 2. Check Port
-                port_active = check_port(port=port_to_check, retries=30, delay=2) # Check correct port
-
-                if port_active:
-                    status_placeholder.success(f"Port {port_to_check} active!")
-                    run_summary_md += f"* ✅ Port {port_to_check} is active.\n"
-                    status_placeholder.markdown(run_summary_md) # Update summary
-
-                    # 3. Run Robot Tests (Check if path exists and is configured)
-                    robot_path_valid = 'full_robot_path' in locals() and isinstance(full_robot_path, Path) and full_robot_path.is_dir()
-
-                    if not robot_path_valid:
-                        status_placeholder.warning(f"Cannot run Robot tests: Path not configured or found. Skipping tests and Git operations.")
-                        run_summary_md += f"* ⚠️ Warning: Robot test path not configured or found, skipping tests & Git.\n"
-                        tests_succeeded = False # Mark as failed to skip git
-                    else:
-                        run_summary_md += "* ▶️ Running Robot Framework tests...\n"
-                        status_placeholder.info("Running Robot Framework tests...") # Update status area
-                        status_placeholder.markdown(run_summary_md) # Update summary display
-
-                        # Run tests and get logs
-                        tests_succeeded, robot_output = run_robot_tests(full_robot_path, PROJECT_ROOT_PATH)
-
-                        # Add Robot log message to history immediately
-                        log_status = "Success" if tests_succeeded else "Failure"
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "type": "robot_log",
-                            "content": f"Robot Test Run: {log_status}\n\n{robot_output}" # Add status to content
-                        })
-
-                        if tests_succeeded:
-                            run_summary_md += "* ✅ Robot tests completed successfully.\n"
-                            status_placeholder.success("Robot tests passed!")
-                        else:
-                            run_summary_md += "* ❌ Robot tests failed.\n"
-                            status_placeholder.error("Robot tests failed.")
-                            # tests_succeeded is already False
-
-                    # 4. Run Git Operations (only if tests succeeded or were skipped due to config but app started)
-                    # We only run git if tests_succeeded is True
-                    if tests_succeeded:
-                        run_summary_md += "* ▶️ Running Git operations (add, commit, push)...\n"
-                        status_placeholder.info("Running Git operations...") # Update status area
-                        status_placeholder.markdown(run_summary_md) # Update summary display
-                        result = git_operations.execute_git_flow(PROJECT_ROOT, GIT_COMMIT_MESSAGE, "")
-                        
-                        if isinstance(result, tuple) and len(result) == 2:
-                            success, message = result
-                            run_summary_md += message
-                            
-                            if success and git_operations.deploy_to_heroku_separate_terminal(PROJECT_ROOT):
-                                run_summary_md += "* ✅ Initiated Heroku deployment from new terminal\n"
-                            else:
-                                run_summary_md += "* ❌ Failed to initiate Heroku deployment\n"
-                        else:
-                            run_summary_md += "* ❌ Git operations returned unexpected result\n"
-                            st.error(f"Git operations returned unexpected format: {result}")
-
-                else: # Port not active
-                    status_placeholder.error(f"Port {port_to_check} did not become active. Check application terminal. Skipping tests & Git.")
-                    run_summary_md += f"* ❌ Error: Port {port_to_check} did not become active. Skipping tests & Git.\n"
+            status_placeholder.info("Starting the run myapp pipeline (app start, browser warm-up and git fetch run in parallel)...")
+            timeline_placeholder = st.empty() # Live per-stage timeline
+            live_log_placeholder = st.empty() # Live tail of the robot console
+            shared = {}
+            run_span = start_span("run myapp", root=True, flags=" ".join(sorted(run_flags)) or "default")
+            # Cap how many pipelines (sessions/users) run side by side on this machine
+            with span("wait for pipeline slot"):
+                acquire_pipeline_slot(on_wait=lambda waited: status_placeholder.info(
+                    f"Waiting for a free pipeline slot ({MAX_CONCURRENT_PIPELINES} already running, {waited:.0f}s)..."))
+            try:
+                pipeline = build_myapp_pipeline(run_flags, status_placeholder, live_log_placeholder, shared)
+                # Process trees of this run: mvn and the app JVM, Robot (found by its output dir) and the browser pool
+                monitor = ResourceMonitor({
+                    "app": lambda: processes_with_arg(f"-Dserver.port={shared['port']}", exact=True) + listening_pids(shared["port"]),
+                    "robot": lambda: processes_with_arg(str(shared["run_dir"])),
+                    "browser": lambda: pool_owner_pids(shared.get("pool_registry")),
+                })
+                with monitor:
+                    pipeline.run(on_update=lambda timeline, elapsed: timeline_placeholder.markdown(format_timeline(timeline, elapsed)))
+                run_span.set_attribute("port", shared["port"])
+            finally:
+                PIPELINE_SLOTS.release()
+                if "run_dir" in shared:
+                    finish_run_dir(shared["run_dir"])
+                run_span.end()  # Writes the trace shown under "Trace of the latest run"
+            resource_stats = stage_resource_stats(monitor.samples, pipeline.timeline, pipeline.start_time)
+            resource_history = load_resource_history()
+            record_resource_history(resource_stats, shared["run_dir"].name, pipeline.elapsed())
+
+            if "robot_message" in shared:
+                st.session_state.messages.append(shared["robot_message"])
+            st.session_state.setdefault("push_jobs", []).extend(shared.get("push_jobs", []))
+            run_summary_md += format_pipeline_summary(pipeline)
+            run_summary_md += "\n#### Stage timeline\n\n" + format_timeline(pipeline.timeline, pipeline.elapsed())
+            run_summary_md += "\n#### Resource usage\n\n" + format_resource_report(
+                resource_stats, find_regressions(resource_stats, resource_history))
 
             # Append the final summary message AFTER logs have been added
             st.session_state.messages.append({"role": "assistant", "content": run_summary_md})
             # Clear placeholders at the end
             status_placeholder.empty()
             git_status_placeholder.empty()
+            timeline_placeholder.empty()
+            live_log_placeholder.empty()
             st.rerun() # Rerun to display all new messages
 
 
@@ -759,8 +894,10 @@ if prompt := st.chat_input("Ask AI, or type 'run myapp'"):
             full_response_text = ""
             st.session_state.proposed_changes = None # Clear previous proposal before new request
             assistant_message = {"role": "assistant", "content": "...", "code_proposals": []} # Default message
+            turn_span = start_span("chat turn", root=True, prompt=prompt[:80])
 
             try:
+                phase_span = start_span("build prompt")
                 # Indicate thinking right away
                 thinking_status = message_placeholder.status("Thinking...", expanded=False)
 
@@ -856,10 +993,15 @@ Instructions:
 Please provide your analysis, explanation, modified code, or new code based on the user's request:
 """
 
+                phase_span.set_attribute("context_files", files_processed_for_context)
+                phase_span.set_attribute("prompt_chars", len(ai_prompt))
+                phase_span.end()
+
                 # Send prompt to Gemini
                 # Update status before sending
                 if thinking_status: thinking_status.update(label="Sending request to Gemini AI...")
 
+                phase_span = start_span("gemini stream", model=MODEL_NAME)
                 response = st.session_state.chat.send_message(ai_prompt, stream=True)
 
                 # Stream the response
@@ -879,6 +1021,8 @@ Please provide your analysis, explanation, modified code, or new code based on t
 
                     # Append text and update placeholder
                     chunk_text = chunk.text
+                    if not response_chunks:
+                        phase_span.set_attribute("first_chunk_ms", round((time.time() - phase_span.start) * 1000))
                     response_chunks.append(chunk_text)
                     full_response_text = "".join(response_chunks) # Rebuild full text each time
                     # ***** CORRECTION: Check placeholder before writing *****
@@ -887,6 +1031,10 @@ Please provide your analysis, explanation, modified code, or new code based on t
                     stream_successful = True
 
 
+                phase_span.set_attribute("chunks", len(response_chunks))
+                phase_span.set_attribute("response_chars", len(full_response_text))
+                phase_span.end()
+
                 if not stream_successful and not full_response_text : # Handle case where stream failed early
                      full_response_text = "Error: Failed to get response stream from AI."
                      if message_placeholder: message_placeholder.error(full_response_text)
@@ -903,7 +1051,9 @@ Please provide your analysis, explanation, modified code, or new code based on t
                     assistant_message = {"role": "assistant", "content": full_response_text, "code_proposals": []}
                 else:
                     # Parse the final response for code blocks AND determine paths
-                    parsed_proposals = parse_gemini_response(full_response_text)
+                    with span("parse response") as parse_span:
+                        parsed_proposals = parse_gemini_response(full_response_text)
+                        parse_span.set_attribute("proposals", len(parsed_proposals or []))
                     # Basic message contains the full text regardless of proposals
                     assistant_message = {"role": "assistant", "content": full_response_text}
 
@@ -929,6 +1079,8 @@ Please provide your analysis, explanation, modified code, or new code based on t
                 if thinking_status: thinking_status.update(label="Processing Error", state="error", expanded=True)
                 # Set assistant message to the error
                 assistant_message = {"role": "assistant", "content": full_response_text, "code_proposals": []}
+                turn_span.set_error(e)
+            turn_span.end()
 
 
             # Add assistant response to chat history
@@ -0,0 +1,89 @@
+"""
+Compare per-test Robot times across browser profiles.
+
+Runs the employee suite several times with each ${BROWSER_PROFILE} and prints
+a markdown table of the median time per test. The app must already be running
+on the suite's BASE_URL (e.g. after `run myapp`).
+
+    python benchmark_browser_profiles.py --runs 3 --profiles normal fast
+    python benchmark_browser_profiles.py --runs 5 --publish   # Also writes the table into README.md
+"""
+import argparse
+import datetime
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from config import PROJECT_ROOT, AUTODEV_STATE_DIR, relative_robot_path_str
+from robot_results import read_test_results
+
+BENCHMARK_DIR = AUTODEV_STATE_DIR / "benchmarks"
+README = Path(__file__).resolve().with_name("README.md")
+README_START, README_END = "<!-- browser-profile-benchmark -->", "<!-- /browser-profile-benchmark -->"
+
+def run_profile(test_path, profile, run_index, viewport=None):
+    """Run the suite once with a browser profile; returns its per-test records"""
+    output_dir = BENCHMARK_DIR / f"{profile}-{run_index}"
+    command = ["robot", "--outputdir", str(output_dir), "--log", "NONE", "--report", "NONE",
+               "--variable", f"BROWSER_PROFILE:{profile}"]
+    if viewport:
+        command += ["--variable", f"BROWSER_VIEWPORT:{viewport}"]
+    subprocess.run(command + [str(test_path)], cwd=str(PROJECT_ROOT), stdout=subprocess.DEVNULL)
+    output_xml = output_dir / "output.xml"
+    return read_test_results(output_xml) if output_xml.exists() else []
+
+def format_benchmark(timings, profiles):
+    """Markdown table of median seconds per test and profile, plus the suite total"""
+    tests = sorted({name for per_test in timings.values() for name in per_test})
+    md = "| Test | " + " | ".join(profiles) + " |\n|---|" + "---|" * len(profiles) + "\n"
+    totals = dict.fromkeys(profiles, 0.0)
+    for name in tests:
+        cells = []
+        for profile in profiles:
+            samples = timings[profile].get(name)
+            if samples:
+                median = statistics.median(samples)
+                totals[profile] += median
+                cells.append(f"{median:.2f}s")
+            else:
+                cells.append("-")
+        md += f"| {name.split('.')[-1]} | " + " | ".join(cells) + " |\n"
+    md += "| **Total** | " + " | ".join(f"**{totals[p]:.2f}s**" for p in profiles) + " |\n"
+    return md
+
+def publish(report, runs, readme=README):
+    """Replace the measured table between the benchmark markers in README.md"""
+    text = readme.read_text(encoding="utf-8")
+    start, end = text.index(README_START) + len(README_START), text.index(README_END)
+    measured = (f"Measured {datetime.date.today().isoformat()} on {platform.platform()}, "
+                f"median of {runs} runs per profile:")
+    readme.write_text(text[:start] + f"\n{measured}\n\n{report}" + text[end:], encoding="utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Suite runs per profile")
+    parser.add_argument("--profiles", nargs="+", default=["normal", "fast"])
+    parser.add_argument("--viewport", help="Initial headless window for non-normal profiles, e.g. 1280,720")
+    parser.add_argument("--test-path", default=str(PROJECT_ROOT / relative_robot_path_str))
+    parser.add_argument("--publish", action="store_true", help="Write the table into README.md")
+    args = parser.parse_args()
+
+    timings = {profile: {} for profile in args.profiles}
+    for run_index in range(args.runs):
+        for profile in args.profiles:  # Interleave profiles so drift affects both equally
+            viewport = args.viewport if profile != "normal" else None
+            for result in run_profile(Path(args.test_path), profile, run_index, viewport):
+                if result["status"] == "PASS" and result["duration"] is not None:
+                    timings[profile].setdefault(result["name"], []).append(result["duration"])
+
+    report = format_benchmark(timings, args.profiles)
+    BENCHMARK_DIR.mkdir(parents=True, exist_ok=True)
+    (BENCHMARK_DIR / "browser_profiles.md").write_text(report, encoding="utf-8")
+    print(report)
+    if args.publish:
+        if not all(timings.values()):
+            raise SystemExit("Not publishing: a profile has no passing tests (is the app running?)")
+        publish(report, args.runs)
+
+if __name__ == "__main__":
+    main()
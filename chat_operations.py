@@ -3,8 +3,11 @@ from config import *
 from file_operations import find_project_file, read_file_content, get_file_language
 from gemini_operations import parse_gemini_response
 import git_operations
-from process_operations import check_port, run_command_separate_terminal, run_robot_tests
+from process_operations import (check_port, run_command_separate_terminal, run_robot_tests_scheduled,
+                                find_free_port, create_run_dir, finish_run_dir)
+from robot_results import format_results_markdown
 import re
+from tracing import traced
 
 def process_chat_message(message, index=None):
     """Process and display chat message with code proposals"""
@@ -41,6 +44,7 @@ def handle_code_proposal(proposal, path_display):
     else:
         st.error("Cannot determine safe file path for this code. Cannot apply changes.")
 
+@traced("run myapp", root=True)
 def handle_run_myapp():
     """Handle the 'run myapp' command sequence"""
     st.session_state.proposed_changes = None
@@ -48,13 +52,14 @@ def handle_run_myapp():
         status_placeholder = st.empty()
         git_status_placeholder = st.empty()
         run_summary_md = "### MyApp Execution Sequence\n\n"
+        port = find_free_port()  # Per-run port so concurrent runs do not test each other's app
 
         # Start Spring Boot
-        if not start_spring_boot(status_placeholder, run_summary_md):
+        if not start_spring_boot(status_placeholder, run_summary_md, port):
             return
 
         # Check port and run tests
-        if check_port_and_run_tests(status_placeholder, run_summary_md):
+        if check_port_and_run_tests(status_placeholder, run_summary_md, port):
             # Run Git operations if tests passed
             run_git_operations(status_placeholder, run_summary_md)
 
@@ -64,11 +69,12 @@ def handle_run_myapp():
         git_status_placeholder.empty()
         st.rerun()
 
-def start_spring_boot(status_placeholder, run_summary_md):
+@traced()
+def start_spring_boot(status_placeholder, run_summary_md, port):
     """Start Spring Boot application"""
     status_placeholder.info("Attempting to start Spring Boot app (`mvn spring-boot:run`) in a new terminal...")
     started = run_command_separate_terminal(
-        ["mvn", "spring-boot:run", "-Dserver.port=8081"],
+        ["mvn", "spring-boot:run", f"-Dserver.port={port}"],
         cwd=PROJECT_ROOT_PATH
     )
     
@@ -80,10 +86,10 @@ def start_spring_boot(status_placeholder, run_summary_md):
         return False
     return True
 
-def check_port_and_run_tests(status_placeholder, run_summary_md):
+@traced()
+def check_port_and_run_tests(status_placeholder, run_summary_md, port):
     """Check port activity and run tests if port is active"""
-    port_to_check = 8081
-    if not wait_for_port(port_to_check, status_placeholder, run_summary_md):
+    if not wait_for_port(port, status_placeholder, run_summary_md):
         return False
 
     robot_path_valid = 'full_robot_path' in globals() and isinstance(full_robot_path, Path) and full_robot_path.is_dir()
@@ -96,11 +102,20 @@ def check_port_and_run_tests(status_placeholder, run_summary_md):
     status_placeholder.info("Running Robot Framework tests...")
     status_placeholder.markdown(run_summary_md)
 
-    tests_succeeded, robot_output = run_robot_tests(full_robot_path, PROJECT_ROOT_PATH)
+    app_url = f"http://localhost:{port}"
+    run_dir = create_run_dir(port)
+    try:
+        tests_succeeded, robot_output, run_report = run_robot_tests_scheduled(
+            full_robot_path, PROJECT_ROOT_PATH, variables={"BASE_URL": app_url, "FRONTEND_URL": app_url},
+            output_dir=run_dir)
+    finally:
+        finish_run_dir(run_dir)
     st.session_state.messages.append({
         "role": "assistant",
-        "type": "robot_log",
-        "content": f"Robot Test Run: {'Success' if tests_succeeded else 'Failure'}\n\n{robot_output}"
+        "type": "robot_results",
+        "content": format_results_markdown(run_report["results"], tests_succeeded, run_report["output_dir"]),
+        "results": run_report["results"],
+        "output_dir": run_report["output_dir"],
     })
 
     update_test_status(tests_succeeded, status_placeholder, run_summary_md)
@@ -128,21 +143,30 @@ def update_test_status(tests_succeeded, status_placeholder, run_summary_md):
         run_summary_md += "* ❌ Robot tests failed.\n"
         status_placeholder.error("Robot tests failed.")
 
+@traced()
 def run_git_operations(status_placeholder, run_summary_md):
     """Execute Git operations"""
     run_summary_md += "* ▶️ Running Git operations (add, commit, push)...\n"
     status_placeholder.info("Running Git operations...")
     status_placeholder.markdown(run_summary_md)
     
-    result = git_operations.execute_git_flow(PROJECT_ROOT, GIT_COMMIT_MESSAGE, "")
-    if isinstance(result, tuple) and len(result) == 2:
-        success, message = result
+    written_paths = st.session_state.setdefault("written_paths", set())
+    committed_paths = set(written_paths)
+    result = git_operations.execute_git_flow(PROJECT_ROOT, GIT_COMMIT_MESSAGE, "", paths=committed_paths,
+                                             push_async=True)
+    if isinstance(result, tuple) and len(result) == 3:
+        success, message, push_job = result
         run_summary_md += message
-        
-        if success and git_operations.deploy_to_heroku_separate_terminal(PROJECT_ROOT):
-            run_summary_md += "* ✅ Initiated Heroku deployment from new terminal\n"
+        if success:
+            written_paths.difference_update(committed_paths)
+            # Pushes run on the background queue; aiagent reports them when they finish
+            push_jobs = st.session_state.setdefault("push_jobs", [])
+            if push_job is not None:  # None when there was nothing to commit
+                push_jobs.append(push_job.id)
+            push_jobs.append(git_operations.queue_heroku_deploy(PROJECT_ROOT, after=push_job).id)
+            run_summary_md += "* ⏳ Heroku deployment queued\n"
         else:
-            run_summary_md += "* ❌ Failed to initiate Heroku deployment\n"
+            run_summary_md += "* ❌ Git operations failed; Heroku deployment skipped\n"
     else:
         run_summary_md += "* ❌ Git operations returned unexpected result\n"
         st.error(f"Git operations returned unexpected format: {result}")
\ No newline at end of file
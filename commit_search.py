@@ -0,0 +1,204 @@
+"""
+On-disk search index over a branch's history: commit messages, authors,
+dates and touched paths in SQLite FTS5.
+
+    index = CommitSearchIndex(repo_path)
+    index.update("main")      # Indexes only the commits since the last indexed head
+    index.search("path:EmployeeController since:2025-04-01")
+
+Queries take `author:`, `path:`, `since:`, `until:` and `on:` filters. Dates
+are YYYY-MM-DD, `today`, `yesterday` or a weekday (its last occurrence);
+"last tuesday" and "yesterday" also work without a filter prefix. Other words
+match the message, author and paths by prefix.
+"""
+import datetime
+import os
+import sqlite3
+import subprocess
+import threading
+
+INDEX_FILE = os.path.join(".autodev", "commit_index.sqlite")  # Relative to the repository
+INSERT_BATCH = 1000
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+STOP_WORDS = {"a", "an", "and", "by", "commit", "commits", "changed", "from", "in", "last", "of", "on",
+              "show", "that", "the", "to", "with"}
+
+# Fields of one commit in `git log` output; records start with \x1e, fields end with \x1f
+LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%at%x1f%B%x1f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY, sha TEXT UNIQUE NOT NULL, author TEXT, email TEXT, time INTEGER, summary TEXT
+);
+CREATE INDEX IF NOT EXISTS commits_time ON commits (time);
+CREATE VIRTUAL TABLE IF NOT EXISTS commit_text USING fts5 (message, author, paths, content='');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Updates are serialized across sessions of this server; SQLite handles readers
+_update_lock = threading.Lock()
+
+class CommitSearchIndex:
+    def __init__(self, repo_path, index_file=INDEX_FILE):
+        self.repo_path = str(repo_path)
+        self.path = os.path.join(self.repo_path, index_file)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")  # Searches keep working while an update writes
+        return db
+
+    def _git(self, args):
+        process = subprocess.run(['git', '-C', self.repo_path] + args, capture_output=True, text=True)
+        return process.returncode == 0, process.stdout.strip()
+
+    def _log_records(self, rev_range):
+        """(sha, author, email, time, message, paths) per commit, streamed from one `git log`"""
+        process = subprocess.Popen(
+            ['git', '-C', self.repo_path, '-c', 'core.quotePath=false', 'log', f'--format={LOG_FORMAT}',
+             '--name-only', '--no-renames', rev_range],
+            stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+        buffer = ""
+        try:
+            while True:
+                chunk = process.stdout.read(1 << 16)
+                buffer += chunk
+                records = buffer.split("\x1e")
+                buffer = records.pop() if chunk else ""  # The last record may still be incomplete
+                for record in records:
+                    fields = record.split("\x1f")
+                    if len(fields) == 6:
+                        sha, author, email, time, message, paths = fields
+                        yield sha, author, email, int(time), message.strip(), " ".join(paths.split())
+                if not chunk:
+                    break
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    def indexed_head(self):
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = 'head'").fetchone()
+        return row[0] if row else None
+
+    def update(self, ref="HEAD"):
+        """
+        Index the commits reachable from `ref` that are not indexed yet. When
+        the indexed head is no longer in the history (a rewrite), the index is
+        rebuilt. Returns the number of commits added.
+        """
+        ok, head = self._git(['rev-parse', '--verify', f'{ref}^{{commit}}'])
+        if not ok:
+            return 0
+        with _update_lock:
+            last = self.indexed_head()
+            if last == head:
+                return 0
+            db = self._connect()
+            try:
+                if last and self._git(['merge-base', '--is-ancestor', last, head])[0]:
+                    rev_range = f"{last}..{head}"
+                else:
+                    db.execute("DELETE FROM commits")
+                    db.execute("INSERT INTO commit_text (commit_text) VALUES ('delete-all')")
+                    rev_range = head
+                added = 0
+                batch = []
+                for record in self._log_records(rev_range):
+                    batch.append(record)
+                    if len(batch) >= INSERT_BATCH:
+                        added += self._insert(db, batch)
+                        batch = []
+                added += self._insert(db, batch)
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('head', ?)", (head,))
+                db.commit()
+            finally:
+                db.close()
+        return added
+
+    def _insert(self, db, records):
+        added = 0
+        for sha, author, email, time, message, paths in records:
+            cursor = db.execute("INSERT OR IGNORE INTO commits (sha, author, email, time, summary) VALUES (?, ?, ?, ?, ?)",
+                                (sha, author, email, time, message.split("\n")[0]))
+            if cursor.rowcount:
+                db.execute("INSERT INTO commit_text (rowid, message, author, paths) VALUES (?, ?, ?, ?)",
+                           (cursor.lastrowid, message, f"{author} {email}", paths))
+                added += 1
+        return added
+
+    def search(self, query, limit=20):
+        """Matching commits, newest first: [{sha, summary, author, date}]"""
+        match, since, until = parse_query(query)
+        sql = "SELECT c.sha, c.summary, c.author, c.time FROM commits c"
+        where, params = [], []
+        if match:
+            sql += " JOIN commit_text ON commit_text.rowid = c.id"
+            where.append("commit_text MATCH ?")
+            params.append(match)
+        if since is not None:
+            where.append("c.time >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("c.time < ?")
+            params.append(until)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY c.time DESC LIMIT ?"
+        with self._connect() as db:
+            rows = db.execute(sql, params + [limit]).fetchall()
+        return [{"sha": sha, "summary": summary, "author": author,
+                 "date": datetime.datetime.fromtimestamp(time).strftime('%Y-%m-%d %H:%M:%S')}
+                for sha, summary, author, time in rows]
+
+def _fts_term(text, column=None):
+    """A quoted FTS5 prefix phrase, optionally limited to one column"""
+    term = '"' + text.replace('"', '""') + '"*'
+    return f"{column} : {term}" if column else term
+
+def _parse_day(text, today=None):
+    """Date for YYYY-MM-DD, today, yesterday or a weekday (its latest occurrence before today); None otherwise"""
+    today = today or datetime.date.today()
+    text = text.lower()
+    if text == "today":
+        return today
+    if text == "yesterday":
+        return today - datetime.timedelta(days=1)
+    if text in WEEKDAYS:
+        return today - datetime.timedelta(days=(today.weekday() - WEEKDAYS.index(text) - 1) % 7 + 1)
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return None
+
+def _timestamp(day):
+    return int(datetime.datetime.combine(day, datetime.time()).timestamp())
+
+def parse_query(query, today=None):
+    """(FTS5 match expression or "", since timestamp or None, until timestamp or None)"""
+    terms, since, until = [], None, None
+    words = query.split()
+    for i, word in enumerate(words):
+        field, _, value = word.partition(":")
+        field = field.lower()
+        if value and field in ("since", "until", "on"):
+            day = _parse_day(value, today)
+            if day is None:
+                terms.append(_fts_term(word))
+            elif field == "since":
+                since = _timestamp(day)
+            elif field == "until":
+                until = _timestamp(day + datetime.timedelta(days=1))
+            else:
+                since, until = _timestamp(day), _timestamp(day + datetime.timedelta(days=1))
+        elif value and field in ("author", "path"):
+            terms.append(_fts_term(value, "author" if field == "author" else "paths"))
+        elif word.lower() in ("today", "yesterday") or (word.lower() in WEEKDAYS and i and words[i - 1].lower() == "last"):
+            day = _parse_day(word, today)
+            since, until = _timestamp(day), _timestamp(day + datetime.timedelta(days=1))
+        elif word.lower().strip("`'\",.?") not in STOP_WORDS:
+            terms.append(_fts_term(word.strip("`'\",.?")))
+    return " AND ".join(t for t in terms if t != '""*'), since, until
@@ -10,6 +10,38 @@ STATIC_SRC_DIR = 'src/main/resources/static'
 ROBOT_TESTS_PATH_STR = "E:/ERP/dev/CursorAI2/myautodev/src/test/robotframework"
 relative_robot_path_str = "src/test/robotframework"
 
+# Local agent state (test history, caches); kept out of git via .gitignore
+AUTODEV_STATE_DIR = PROJECT_ROOT / ".autodev"
+
+# Per-session git worktrees under .autodev/worktrees (edits, builds and tests stay isolated per chat session)
+SESSION_WORKTREES = True
+WORKTREE_MAX_AGE_HOURS = 48  # Idle, clean worktrees older than this are removed
+UNDO_STORE_MAX_MB = 200  # Compressed pre-write file contents kept for undo under .autodev/undo; oldest turns go first
+
+# run myapp pipeline
+PIPELINE_MAX_WORKERS = 4  # Pipeline steps that may run at the same time
+MAX_CONCURRENT_PIPELINES = 2  # run myapp pipelines allowed side by side (each gets its own port and output dir)
+ROBOT_RUNS_KEPT = 10  # Per-run Robot output directories kept under .autodev/runs
+RESOURCE_SAMPLE_INTERVAL = 1.0  # Seconds between CPU/RSS/thread/fd samples of the app, Robot and browser processes
+RESOURCE_HISTORY_KEPT = 200  # Runs kept in .autodev/resource_history.jsonl
+RESOURCE_BASELINE_RUNS = 10  # Previous runs whose median is the baseline for regression warnings
+RESOURCE_REGRESSION_FACTOR = 1.25  # Warn when a run uses this many times the baseline
+TRACES_KEPT = 50  # Chrome-format trace files of chat turns and runs kept under .autodev/traces
+
+# Robot Framework Test Scheduling
+# Parallel robot shards; 1 runs the suite in a single process. Shards share the one running app and its
+# database, so above 1 tests must not assert on global state (row counts, "the last employee") another shard changes
+ROBOT_WORKERS = 1
+DURATION_DECAY_ALPHA = 0.3  # Weight of the latest run in the per-test duration estimate
+BROWSER_PROFILE = "normal"  # Robot browser profile: normal, headless or fast (headless, no images/fonts/animations)
+BROWSER_POOL_SIZE = 0  # Pre-launched headless browsers leased by Robot suites/shards; 0 launches one per suite
+ROBOT_RERUN_RETRIES = 2  # Retries of failed tests before a failure counts as hard; 0 disables reruns
+ROBOT_KEYWORD_PROFILING = True  # Attach robot_profiler.py; writes keyword_profile.md next to output.xml
+ROBOT_OUTPUT_TAIL_KB = 64  # Console output kept in memory per run; the rest spills to disk
+ROBOT_OUTPUT_UPDATE_INTERVAL = 0.5  # Seconds between live console updates in the UI
+FULL_SUITE_INTERVAL_HOURS = 24  # Run the whole suite at least this often; otherwise only affected tests
+TEST_CACHE_MAX_ENTRIES = 20  # Passing test runs kept (least recently used dropped first), keyed by a hash of app, suite and library inputs
+
 # Git Configuration
 GIT_REPO_URL = "https://github.com/bharath412/myautodev.git"
 GIT_COMMIT_MESSAGE = "feat: AI-assisted code changes and test updates"
@@ -1,7 +1,11 @@
 from pathlib import Path
+import os
 import re
+import shutil
+import tempfile
 import streamlit as st
 from config import PROJECT_ROOT, JAVA_SRC_DIRS, STATIC_SRC_DIR, relative_robot_path_str
+from undo_journal import record_changes, new_turn_id
 
 def find_project_file(filename_or_path):
     """Find files within the project structure"""
@@ -38,17 +42,100 @@ def read_file_content(file_path):
         st.error(f"Error reading file {file_path}: {e}")
         return None
 
-def write_changes_to_file(file_path_str, new_content):
-    """Write content to file safely"""
+def write_changes_to_file(file_path_str, new_content, turn=None):
+    """Write content to file safely; the old contents are kept in the undo journal of `turn`"""
     try:
         file_path = Path(file_path_str)
         if not file_path.resolve().is_relative_to(PROJECT_ROOT.resolve()):
             st.error(f"Security Error: Attempted to write file outside project root: {file_path}")
             return False
 
+        before = file_path.read_bytes() if file_path.exists() else None
         file_path.parent.mkdir(parents=True, exist_ok=True)
         file_path.write_text(new_content, encoding='utf-8')
+        record_changes([(file_path, before)], turn or new_turn_id())
+        record_written_path(file_path)
         return True
     except Exception as e:
         st.error(f"Error writing changes to {file_path_str}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def record_written_path(file_path, project_root=PROJECT_ROOT):
+    """Remember a file the agent wrote in this session; the git flow stages exactly these paths"""
+    relative = Path(file_path).resolve().relative_to(Path(project_root).resolve()).as_posix()
+    st.session_state.setdefault("written_paths", set()).add(relative)
+
+def _fsync_dirs(dirs):
+    """Persist renames in each directory once (POSIX only; Windows has no directory handles)"""
+    if os.name == "nt":
+        return
+    for directory in dirs:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def apply_changes_atomically(changes, project_root=PROJECT_ROOT, turn=None):
+    """
+    Write several files as one unit: every new content goes to a temp file
+    next to its target first (fsynced), then all targets are swapped in with
+    os.replace and each touched directory is fsynced once. If anything fails
+    the files already replaced get their old contents back and new files and
+    directories are removed. Once everything is in place the old contents go
+    into the undo journal of `turn`. `changes` is [(path, content)]; returns (success, message).
+    """
+    root = Path(project_root).resolve()
+    targets = {}
+    for path, content in changes:
+        resolved = Path(path).resolve()
+        if not resolved.is_relative_to(root):
+            return False, f"Security Error: Attempted to write file outside project root: {path}"
+        targets[resolved] = content  # A later proposal for the same file wins
+
+    created_dirs, temps, originals, replaced = [], {}, {}, []
+    try:
+        for target, content in targets.items():
+            missing = [d for d in [target.parent, *target.parent.parents] if not d.exists()]
+            for directory in reversed(missing):
+                directory.mkdir()
+                created_dirs.append(directory)
+            originals[target] = target.read_bytes() if target.exists() else None
+            fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+            temps[target] = Path(temp)
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            if originals[target] is not None:
+                shutil.copymode(target, temp)  # Keep the executable bit and friends
+        for target, temp in temps.items():
+            os.replace(temp, target)
+            replaced.append(target)
+        _fsync_dirs({target.parent for target in targets})
+    except Exception as e:
+        for target in replaced:
+            try:
+                if originals[target] is None:
+                    target.unlink()
+                else:
+                    target.write_bytes(originals[target])
+            except OSError:
+                pass
+        for temp in temps.values():
+            temp.unlink(missing_ok=True)
+        for directory in reversed(created_dirs):
+            try:
+                directory.rmdir()
+            except OSError:
+                pass
+        return False, f"No files were changed; writing failed: {e}"
+
+    message = f"Applied {len(targets)} file(s)"
+    try:
+        record_changes(list(originals.items()), turn or new_turn_id())  # Only once every file is in place
+    except OSError as e:
+        message += f" (undo is not available: {e})"
+    for target in targets:
+        record_written_path(target, project_root)
+    return True, message
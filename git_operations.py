@@ -7,6 +7,19 @@ import platform
 from pathlib import Path
 import shlex
 import streamlit as st
+import os
+import shutil
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from git import Repo, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+try:
+    import pygit2  # Optional: status and staging in process
+except ImportError:
+    pygit2 = None
+from tracing import span, traced
 
 def run_git_command(command, cwd, status_placeholder=None):
     """Run a git command and return output and success status"""
@@ -18,14 +31,15 @@ def run_git_command(command, cwd, status_placeholder=None):
         if not command[0].startswith('git'):
             command = ['git'] + command
 
-        process = subprocess.run(
-            command,
-            cwd=cwd_str,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
+        with span(f"git {command[1]}", command=' '.join(command[1:]), cwd=cwd_str):
+            process = subprocess.run(
+                command,
+                cwd=cwd_str,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=True
+            )
         
         output = process.stdout + process.stderr
         if status_placeholder:
@@ -39,103 +53,428 @@ def run_git_command(command, cwd, status_placeholder=None):
             status_placeholder.code(error_msg)
         return error_msg, False
 
+class GitSession:
+    """
+    One repository opened with GitPython and reused across the steps of a
+    flow. With pygit2 installed, status and staging run in process through
+    libgit2, which applies .gitignore and the .gitattributes eol/text
+    conversions like git does; paths with a `filter=` driver (e.g. LFS) are
+    handed to `git add`, since libgit2 does not run external filters. Without
+    pygit2 both fall back to the git binary. The commit is written from the
+    index with GitPython; only fetch, pull, merge and push spawn git. Every
+    step is timed in `timings`.
+    """
+
+    CONFLICT_CODES = {"DD", "AU", "UD", "UA", "DU", "AA", "UU"}
+    INDEX_FLAGS = (getattr(pygit2, "GIT_STATUS_INDEX_NEW", 0) | getattr(pygit2, "GIT_STATUS_INDEX_MODIFIED", 0) |
+                   getattr(pygit2, "GIT_STATUS_INDEX_DELETED", 0) | getattr(pygit2, "GIT_STATUS_INDEX_RENAMED", 0) |
+                   getattr(pygit2, "GIT_STATUS_INDEX_TYPECHANGE", 0))
+
+    def __init__(self, project_root):
+        self.repo = Repo(project_root)
+        self.root = Path(self.repo.working_tree_dir)
+        self.native = pygit2.Repository(str(self.root)) if pygit2 else None
+        self.lock = threading.RLock()  # Pipeline steps of one run may share the session
+        self.timings = []  # (step, seconds, in process)
+
+    def _config(self, section, option, default=None):
+        try:
+            return self.repo.config_reader().get_value(section, option, default)
+        except Exception:
+            return default
+
+    @contextmanager
+    def _step(self, name, in_process=True):
+        start = time.perf_counter()
+        with span(f"git {name}", in_process=in_process):
+            yield
+        self.timings.append((name, time.perf_counter() - start, in_process))
+
+    def status(self):
+        """
+        {"staged", "modified", "deleted", "untracked", "conflicted"} path lists,
+        untracked files listed one by one.
+        """
+        with self.lock:
+            if self.native is None:
+                return self._git_status()
+            with self._step("status"):
+                self.native.index.read(False)  # Picks up index changes made by git or GitPython
+                flags_by_path = self.native.status(untracked_files="all")
+        result = {"staged": [], "modified": [], "deleted": [], "untracked": [], "conflicted": []}
+        for path, flags in sorted(flags_by_path.items()):
+            if flags & pygit2.GIT_STATUS_CONFLICTED:
+                result["conflicted"].append(path)
+            elif flags & pygit2.GIT_STATUS_WT_NEW and not flags & self.INDEX_FLAGS:
+                result["untracked"].append(path)
+            elif not flags & pygit2.GIT_STATUS_IGNORED:
+                if flags & self.INDEX_FLAGS:
+                    result["staged"].append(path)
+                if flags & (pygit2.GIT_STATUS_WT_MODIFIED | pygit2.GIT_STATUS_WT_TYPECHANGE):
+                    result["modified"].append(path)
+                elif flags & pygit2.GIT_STATUS_WT_DELETED:
+                    result["deleted"].append(path)
+        return result
+
+    def _git_status(self):
+        """status() from one `git status --porcelain -z --untracked-files=all`"""
+        with self._step("status", in_process=False):
+            output = self.repo.git.status("--porcelain", "-z", "--untracked-files=all", strip_newline_in_stdout=False)
+        result = {"staged": [], "modified": [], "deleted": [], "untracked": [], "conflicted": []}
+        records = iter(output.split("\0"))
+        for record in records:
+            if len(record) < 4:
+                continue
+            code, path = record[:2], record[3:]
+            if code[0] in "RC":
+                next(records, None)  # The source path of a rename or copy follows
+            if code == "??":
+                result["untracked"].append(path)
+            elif code in self.CONFLICT_CODES:
+                result["conflicted"].append(path)
+            else:
+                if code[0] not in " ?!":
+                    result["staged"].append(path)
+                if code[1] in "MT":
+                    result["modified"].append(path)
+                elif code[1] == "D":
+                    result["deleted"].append(path)
+        return result
+
+    def _git_add(self, paths=None):
+        with self._step("stage", in_process=False):
+            self.repo.git.add("-A", *(["--", *paths] if paths is not None else []))
+
+    def stage(self, paths=None):
+        """
+        Stage the given repo-relative paths (default: every change, like
+        `git add -A`); missing files are removed from the index and ignored
+        untracked files are left out. Returns the staged paths.
+        """
+        with self.lock:
+            changes = self.status()
+            changed = changes["modified"] + changes["deleted"] + changes["untracked"] + changes["conflicted"]
+            everything = paths is None
+            if everything:
+                paths = changed
+            else:
+                # Paths that are neither changed nor staged (e.g. created and deleted again, or ignored) are skipped
+                known = set(changed) | set(changes["staged"])
+                paths = [path for path in paths if path in known]
+            if not paths:
+                return []
+            native = self.native
+            if native is None or any(native.get_attr(path, "filter") for path in paths):
+                self._git_add(None if everything else paths)
+                return paths
+            try:
+                with self._step("stage"):
+                    index = native.index
+                    index.read(False)
+                    for path in paths:
+                        if os.path.lexists(self.root / path):
+                            index.add(path)  # Runs the eol/text conversions of .gitattributes and core.autocrlf
+                        elif path in index:
+                            index.remove(path)
+                    index.write()
+            except (pygit2.GitError, OSError):
+                # E.g. a submodule or a path libgit2 cannot read; nothing was written, let git stage it all
+                native.index.read(True)
+                self._git_add(None if everything else paths)
+            return paths
+
+    def commit(self, message):
+        """
+        Commit the index on HEAD; returns the new commit's sha, or None when
+        nothing is staged.
+        """
+        with self.lock, self._step("commit"):
+            index = self.repo.index  # A fresh read of .git/index after `git add`
+            if any(stage for _, stage in index.entries):
+                conflicted = sorted({path for path, stage in index.entries if stage})
+                raise GitCommandError("commit", 1, stderr=f"Unmerged paths: {', '.join(conflicted)}")
+            if self.repo.head.is_valid() and index.write_tree().binsha == self.repo.head.commit.tree.binsha:
+                return None
+            return index.commit(message).hexsha
+
+    def tracking_tip(self, remote='origin', branch='main'):
+        """Sha of refs/remotes/<remote>/<branch> as last fetched, read in process; None if missing"""
+        try:
+            return self.repo.remotes[remote].refs[branch].commit.hexsha
+        except (IndexError, ValueError, AttributeError):
+            return None
+
+    def remote_tip(self, remote='origin', branch='main'):
+        """Current sha of the remote branch (one `git ls-remote` round trip); None if unknown"""
+        output, ok = self.run(['ls-remote', remote, f'refs/heads/{branch}'])
+        if not ok or not output.strip():
+            return None
+        return output.split()[0]
+
+    def contains(self, sha, limit=5000):
+        """
+        Whether commit `sha` is HEAD or one of its ancestors, i.e. HEAD would
+        fast-forward the remote. Walks parents in process; a commit that is
+        not in the local object store, or not found within `limit` commits,
+        counts as not contained.
+        """
+        if not self.repo.head.is_valid():
+            return False
+        with self.lock, self._step("ancestry"):
+            pending, seen = [self.repo.head.commit], set()
+            while pending and len(seen) < limit:
+                commit = pending.pop()
+                if commit.hexsha == sha:
+                    return True
+                if commit.hexsha not in seen:
+                    seen.add(commit.hexsha)
+                    pending.extend(commit.parents)
+            return False
+
+    def run(self, args, placeholder=None):
+        """Run git as a subprocess (network operations, merges); returns (output, success)"""
+        with self._step(args[0], in_process=False):
+            return run_git_command(args, self.root, placeholder)
+
+    def format_timings(self, since=0):
+        """Steps from index `since` on: 'status 4 ms, stage 9 ms, commit 12 ms in process; push 1.3 s via git'"""
+        def fmt(steps):
+            return ", ".join(f"{name} {seconds * 1000:.0f} ms" if seconds < 1 else f"{name} {seconds:.1f} s"
+                             for name, seconds, _ in steps)
+        in_process = [t for t in self.timings[since:] if t[2]]
+        spawned = [t for t in self.timings[since:] if not t[2]]
+        parts = ([fmt(in_process) + " in process"] if in_process else []) + ([fmt(spawned) + " via git"] if spawned else [])
+        return "; ".join(parts)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_git_session(project_root):
+    """Cached GitSession for a work tree; raises git.InvalidGitRepositoryError / NoSuchPathError"""
+    key = str(Path(project_root).resolve())
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = GitSession(project_root)
+        return _sessions[key]
+
+def get_changed_paths(cwd):
+    """List repo-relative paths with uncommitted changes, including untracked files"""
+    try:
+        changes = get_git_session(cwd).status()
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return []
+    return list(dict.fromkeys(changes["staged"] + changes["modified"] + changes["deleted"] +
+                              changes["untracked"] + changes["conflicted"]))
+
 def ensure_git_configured(cwd):
     """Verify git configuration"""
     try:
-        # Check git installation
-        version_cmd = subprocess.run(
-            ['git', '--version'], 
-            capture_output=True, 
-            text=True
-        )
-        if version_cmd.returncode != 0:
+        # The git binary is still needed for fetch, pull and push
+        if shutil.which('git') is None:
             return False, "Git is not installed or not in PATH"
 
-        # Check repository
-        git_dir = Path(cwd) / '.git'
-        if not git_dir.is_dir():
+        # Check repository (a worktree's .git is a file, so let GitPython decide)
+        try:
+            session = get_git_session(cwd)
+        except (InvalidGitRepositoryError, NoSuchPathError):
             return False, f"Not a git repository in {cwd}"
 
         # Check config
-        config_cmd = subprocess.run(
-            ['git', 'config', '--list'],
-            cwd=str(cwd),
-            capture_output=True,
-            text=True
-        )
-        
-        if 'user.name' not in config_cmd.stdout or 'user.email' not in config_cmd.stdout:
+        if not session._config('user', 'name') or not session._config('user', 'email'):
             return False, "Git user.name or user.email not configured"
 
         # Check remote
-        remote_cmd = subprocess.run(
-            ['git', 'remote', '-v'],
-            cwd=str(cwd),
-            capture_output=True,
-            text=True
-        )
-        
-        if 'origin' not in remote_cmd.stdout:
+        if 'origin' not in [remote.name for remote in session.repo.remotes]:
             return False, "No remote 'origin' configured"
 
         return True, "Git properly configured"
     except Exception as e:
         return False, f"Git configuration error: {str(e)}"
 
-def execute_git_flow(project_root, commit_message, placeholder):
-    """Execute git add, commit, push flow"""
-    if not isinstance(project_root, Path):
-        project_root = Path(project_root)
-
-    # Ensure we're in a git repository
-    if not (project_root / '.git').is_dir():
-        placeholder.error("Not a git repository!")
-        return False, "Not a git repository"
-
-    # 1. Git status
-    status_output, status_ok = run_git_command(['status'], project_root, placeholder)
-    if not status_ok:
-        return False, status_output
-
-    # 2. Git add
-    add_output, add_ok = run_git_command(['add', '.'], project_root, placeholder)
-    if not add_ok:
-        return False, add_output
-
-    # 3. Git status after add
-    status_output, _ = run_git_command(['status'], project_root, placeholder)
-    if "nothing to commit" in status_output:
-        placeholder.info("No changes to commit")
-        return True, "No changes to commit"
-
-    # 4. Git commit
-    commit_output, commit_ok = run_git_command(
-        ['commit', '-m', commit_message], 
-        project_root, 
-        placeholder
-    )
-    if not commit_ok:
-        return False, commit_output
-
-    # 5. Git pull to avoid conflicts
-    pull_output, pull_ok = run_git_command(
-        ['pull', 'origin', 'main'], 
-        project_root, 
-        placeholder
-    )
-    if not pull_ok:
-        return False, pull_output
-
-    # 6. Git push
-    push_output, push_ok = run_git_command(
-        ['push', 'origin', 'main'], 
-        project_root, 
-        placeholder
-    )
+@traced()
+def stage_paths(project_root, paths, placeholder=None):
+    """
+    Stage exactly `paths` (repo-relative), or their removal where the file is
+    gone; nothing else in the tree is looked at.
+    """
+    try:
+        session = get_git_session(project_root)
+        mark = len(session.timings)
+        staged = session.stage(sorted(paths))
+    except Exception as e:
+        return f"Error: {e}", False
+    message = f"Staged {len(staged)} agent-written path(s) ({session.format_timings(mark)})"
+    if placeholder:
+        placeholder.success(f"✅ {message}")
+    return message, True
+
+@traced()
+def fetch_remote(project_root, remote='origin', branch='main', placeholder=None):
+    """Fetch the remote branch so the later pull only has to merge"""
+    return run_git_command(['fetch', remote, branch], project_root, placeholder)
+
+class PushJob:
+    """A git push waiting in, or finished by, the PushQueue"""
+
+    def __init__(self, project_root, args, label, after=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.project_root = Path(project_root)
+        self.args = args
+        self.label = label
+        self.after = after  # Skipped unless this job succeeded (e.g. deploy after the origin push)
+        self.status = "queued"  # queued, running, done, failed, skipped
+        self.output = ""
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.done = threading.Event()
+
+    @property
+    def duration(self):
+        return (self.finished or time.time()) - (self.started or self.submitted)
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+class PushQueue:
+    """
+    Pushes run one at a time on a background thread, in submission order, so
+    the UI returns right after the commit. Finished jobs are kept (up to
+    `kept`) for completion reporting.
+    """
+
+    def __init__(self, kept=100):
+        self.kept = kept
+        self.jobs = {}  # id -> PushJob, oldest first
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, project_root, args, label, after=None):
+        job = PushJob(project_root, args, label, after)
+        with self._lock:
+            self.jobs[job.id] = job
+            for old_id in list(self.jobs)[:-self.kept]:
+                if self.jobs[old_id].done.is_set():
+                    del self.jobs[old_id]
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="git-push-queue", daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job.after is not None:
+                job.after.wait()
+            if job.after is not None and job.after.status != "done":
+                job.status, job.output = "skipped", f"{job.after.label} did not succeed"
+            else:
+                job.status, job.started = "running", time.time()
+                job.output, ok = run_git_command(job.args, job.project_root)
+                job.status = "done" if ok else "failed"
+            job.finished = time.time()
+            job.done.set()
+
+PUSH_QUEUE = PushQueue()
+
+def format_push_job(job):
+    """One chat line for a finished job"""
+    icon = {"done": "✅", "failed": "❌", "skipped": "⏭️"}.get(job.status, "⏳")
+    line = f"* {icon} {job.label}: {job.status}"
+    if job.started:
+        line += f" in {job.duration:.1f}s"
+    if job.status != "done" and job.output:
+        line += f"\n\n```\n{job.output.strip()[-1500:]}\n```"
+    return line + "\n"
+
+def _commit_pull_push(session, commit_message, placeholder, fetched, push_ref, push_async=False,
+                      remote='origin', branch='main'):
+    """
+    Commit in process, bring in the remote branch only if it moved past HEAD,
+    then push (queued on PUSH_QUEUE with `push_async`). Returns (success,
+    message, queued PushJob or None).
+    """
+    try:
+        commit_sha = session.commit(commit_message)
+    except Exception as e:
+        return False, f"Commit failed: {e}", None
+    if commit_sha is None:
+        if placeholder:
+            placeholder.info("No changes to commit")
+        return True, "No changes to commit", None
+    if placeholder:
+        placeholder.success(f"✅ Committed {commit_sha[:10]}")
+
+    # Pull (or merge the prefetched branch) only when the remote tip is not already in HEAD.
+    # After a fetch the tracking ref is current; otherwise one ls-remote round trip finds the tip.
+    upstream = session.tracking_tip(remote, branch) if fetched else session.remote_tip(remote, branch)
+    if upstream is not None and session.contains(upstream):
+        pull_note = f"{remote}/{branch} unchanged, pull skipped"
+    else:
+        # --no-rebase: without it git refuses to reconcile diverged branches unless pull.rebase is configured
+        pull_command = (['merge', '--no-edit', f'{remote}/{branch}'] if fetched
+                        else ['pull', '--no-rebase', '--no-edit', remote, branch])
+        pull_output, pull_ok = session.run(pull_command, placeholder)
+        if not pull_ok:
+            return False, pull_output, None
+        pull_note = f"merged {remote}/{branch}"
+
+    # Git push
+    push_args = ['push', remote, push_ref]
+    if push_async:
+        job = PUSH_QUEUE.submit(session.root, push_args, f"Push to {remote} {branch}")
+        return True, f"Committed {commit_sha[:10]}, {pull_note}; push queued (job {job.id})", job
+    push_output, push_ok = session.run(push_args, placeholder)
     if not push_ok:
-        return False, push_output
+        return False, push_output, None
+
+    return True, f"Git operations completed successfully; {pull_note}", None
+
+@traced()
+def commit_and_push(project_root, commit_message, placeholder=None, fetched=False, push_ref='main', push_async=False):
+    """
+    Commit the staged changes, merge the remote branch if it moved and push.
+    With `fetched`, origin/main was already fetched and is merged without
+    another round trip. A session worktree pushes with push_ref='HEAD:main'.
+    With `push_async` the push goes to PUSH_QUEUE.
+    Returns (success, message, PushJob of the queued push or None); on
+    success the message ends with the per-step timings.
+    """
+    session = get_git_session(project_root)
+    mark = len(session.timings)
+    success, message, job = _commit_pull_push(session, commit_message, placeholder, fetched, push_ref, push_async)
+    return success, f"{message} ({session.format_timings(mark)})" if success else message, job
+
+@traced()
+def execute_git_flow(project_root, commit_message, placeholder, paths=None, push_async=False):
+    """
+    Execute git add, commit, push flow. With `paths` (the files the agent
+    wrote), only those are staged; None stages every change like `git add -A`.
+    `push_async` queues the push as in commit_and_push, and the same
+    (success, message, PushJob or None) is returned.
+    """
+    # Ensure we're in a git repository (a worktree's .git is a file, so let GitPython decide)
+    try:
+        session = get_git_session(project_root)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        if placeholder:
+            placeholder.error("Not a git repository!")
+        return False, "Not a git repository", None
+    mark = len(session.timings)
+
+    # 1. Stage in process
+    try:
+        session.stage(sorted(paths) if paths is not None else None)
+    except Exception as e:
+        return False, f"Staging failed: {e}", None
 
-    return True, "Git operations completed successfully"
+    # 2. Commit, pull and push
+    success, message, job = _commit_pull_push(session, commit_message, placeholder, False, 'main', push_async)
+    return success, f"{message} ({session.format_timings(mark)})" if success else message, job
 
 # Assuming PROJECT_ROOT is defined in your main script or passed as an argument
 # Example (you might not define it here):
@@ -204,7 +543,10 @@ def run_command_separate_terminal(project_root,command_list, cwd):
         st.error(f"Failed to start command in new terminal: {e}")
     return False
 
-def deploy_to_heroku_separate_terminal(project_root):
-    """Opens a new terminal and runs 'git push heroku main' in the given project root."""
-    command = ["git", "push", "heroku", "main"]
-    return run_command_separate_terminal(project_root,command, project_root)
\ No newline at end of file
+def queue_heroku_deploy(project_root, ref='main', after=None):
+    """
+    Queue `git push heroku <ref>`, behind the PushJob `after` (the origin
+    push commit_and_push returned) when given; it is skipped when that push
+    fails. Returns the PushJob.
+    """
+    return PUSH_QUEUE.submit(project_root, ['push', 'heroku', ref], "Heroku deploy", after=after)
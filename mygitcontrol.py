@@ -1,40 +1,192 @@
 import streamlit as st
 from git import Repo, GitCommandError
 import os
+import json
 import datetime
+import threading
+from bisect import bisect_left
 import chardet
+from commit_search import CommitSearchIndex
 
 # --- CONFIG ---
 REPO_PATH = "E:/ERP/dev/CursorAI2/myautodev"
 BRANCH = "main"
-LOG_FILE = "revert_log.txt"
+LOG_FILE = os.path.join(".autodev", "revert_log.jsonl")  # One JSON object per line: {"time", "status", "action", "commit", "message"}
+LEGACY_LOG_FILE = "revert_log.txt"  # Plain "[timestamp] message" log (tracked), imported into LOG_FILE once
+LEGACY_MIGRATED = LOG_FILE + ".migrated"  # Marks the import as done; the legacy file itself is left alone
+LOG_MAX_BYTES = 1024 * 1024  # LOG_FILE is rotated to LOG_FILE.1 .. .N above this size
+LOG_BACKUPS = 3
+LOGS_SHOWN = 50
+PAGE_SIZE = 20  # Commits per "show commits" / "more commits" page
+PATCH_MAX_BYTES = 64 * 1024  # Patch text loaded per file when it is expanded
+DIFF_FILES_SHOWN = 200  # Files listed in a diff summary
+# Chat commands by word; the first command word in a message picks the command
+COMMAND_WORDS = {"search": "search", "find": "search", "diff": "diff", "revert": "revert",
+                 "commit": "commits", "commits": "commits", "more": "commits",
+                 "log": "log", "logs": "log", "history": "log"}
+
+class CommitIndex:
+    """
+    History of one branch head, read lazily. Pages are pulled from a single
+    `git rev-list` walk as they are requested, so showing the first page does
+    not read the whole history; short hashes are resolved against a sorted
+    list of every sha on the branch with bisect.
+    """
+
+    def __init__(self, repo, head_sha):
+        self.repo = repo
+        self.head_sha = head_sha
+        self.entries = []  # Commit metadata in history order, loaded so far
+        self._walk = repo.iter_commits(head_sha)
+        self._exhausted = False
+        self._sorted_shas = None
+        self._lock = threading.Lock()  # Cached across sessions
+
+    def _load_until(self, count):
+        while len(self.entries) < count and not self._exhausted:
+            commit = next(self._walk, None)
+            if commit is None:
+                self._exhausted = True
+                break
+            self.entries.append({
+                "sha": commit.hexsha,
+                "summary": commit.message.strip().split("\n")[0],
+                "author": commit.author.name,
+                "date": commit.committed_datetime.strftime('%Y-%m-%d %H:%M:%S'),
+            })
+
+    def page(self, cursor=0, size=PAGE_SIZE):
+        """(entries, next cursor or None at the end of history)"""
+        with self._lock:
+            self._load_until(cursor + size + 1)  # One extra tells whether another page exists
+            entries = self.entries[cursor:cursor + size]
+            has_more = len(self.entries) > cursor + size
+        return entries, (cursor + size if has_more else None)
+
+    def resolve(self, prefix):
+        """Full sha on this branch starting with `prefix`; (sha or None, error message)"""
+        prefix = prefix.lower()
+        with self._lock:
+            if self._sorted_shas is None:
+                self._sorted_shas = sorted(self.repo.git.rev_list(self.head_sha).split())
+            shas = self._sorted_shas
+        position = bisect_left(shas, prefix)
+        matches = []
+        while position < len(shas) and shas[position].startswith(prefix) and len(matches) < 2:
+            matches.append(shas[position])
+            position += 1
+        if not matches:
+            return None, f"❌ Commit `{prefix}` is not on `{BRANCH}`."
+        if len(matches) > 1:
+            return None, f"❌ `{prefix}` is ambiguous; use more characters."
+        return matches[0], ""
+
+@st.cache_resource
+def get_repo(path):
+    repo = Repo(path)
+    assert not repo.bare
+    return repo
+
+@st.cache_resource(max_entries=4)
+def get_commit_index(head_sha):
+    """Commit metadata cached per branch head; a new commit or revert starts a new index"""
+    return CommitIndex(get_repo(REPO_PATH), head_sha)
+
+@st.cache_resource
+def get_search_index(path):
+    """Full-history search index (SQLite FTS) kept in the repository's .autodev directory"""
+    return CommitSearchIndex(path)
+
+# set_page_config must be the first Streamlit command of the script, ahead of the cached calls below
+st.set_page_config(page_title="Git Revert Dashboard", layout="wide")
+st.title("🤖 Git Revert Dashboard with AI Agent")
 
 # --- Init Git Repo ---
 try:
-    repo = Repo(REPO_PATH)
-    assert not repo.bare
-    commits = list(repo.iter_commits(BRANCH, max_count=20))
+    repo = get_repo(REPO_PATH)
+    commit_index = get_commit_index(repo.commit(BRANCH).hexsha)
 except Exception as e:
     st.error(f"Git repo error: {e}")
     st.stop()
 
-st.set_page_config(page_title="Git Revert Dashboard", layout="wide")
-st.title("🤖 Git Revert Dashboard with AI Agent")
-
 # --- UTIL FUNCTIONS ---
 
-def write_log(message: str):
-    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+def _rotate_log():
+    """Shift LOG_FILE to LOG_FILE.1 (and .1 to .2, ...) once it is over LOG_MAX_BYTES"""
+    if not os.path.exists(LOG_FILE) or os.path.getsize(LOG_FILE) < LOG_MAX_BYTES:
+        return
+    for i in range(LOG_BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{LOG_FILE}.{i}"):
+            os.replace(f"{LOG_FILE}.{i}", f"{LOG_FILE}.{i + 1}")
+    os.replace(LOG_FILE, f"{LOG_FILE}.1")
+
+def write_log(message: str, commit=None, ok=True, action="revert"):
+    entry = {"time": datetime.datetime.now().isoformat(timespec="seconds"), "status": "ok" if ok else "error",
+             "action": action, "commit": commit, "message": message}
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+    _rotate_log()
     with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] {message}\n")
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
-def revert_commit(commit_hexsha, tag_name=None):
+def predict_revert_conflicts(shas):
+    """
+    Dry run of reverting `shas` (newest first) on HEAD with in-memory merges;
+    the work tree and index are not touched. Returns (ok, {sha: conflicting paths}).
+    """
+    tip = repo.head.commit.hexsha
+    conflicts = {}
+    for sha in shas:
+        # A commit with the parent's tree on top of `sha`: merging it into the tip
+        # has `sha` as merge base, which is a revert of `sha` (git merge-tree
+        # only takes --merge-base from 2.40 on)
+        undo = repo.git.commit_tree(repo.commit(sha).parents[0].tree.hexsha, "-p", sha, "-m", f"Revert {sha}")
+        status, output, stderr = repo.git.merge_tree("--write-tree", "--name-only", tip, undo,
+                                                     with_extended_output=True, with_exceptions=False)
+        if status == 1:
+            conflicts[sha] = output.split("\n\n")[0].splitlines()[1:]
+            continue  # Later reverts are checked without this one
+        if status != 0:
+            raise GitCommandError(["git", "merge-tree", tip, undo], status, stderr)
+        tip = repo.git.commit_tree(output.splitlines()[0], "-p", tip, "-m", "Revert preview")
+    return not conflicts, conflicts
+
+def revert_commits(shas, tag_name=None):
+    """
+    Revert several commits as one `git revert --no-commit` sequence (newest
+    first), then make a single commit and a single push. Conflicts are
+    predicted first, so a revert that would stop halfway is never started.
+    """
     try:
-        repo.git.revert(commit_hexsha, no_edit=True)
-        commit_msg = f"Revert commit {commit_hexsha}"
-        repo.index.commit(commit_msg)
+        ordered = repo.git.rev_list("--no-walk=sorted", *shas).split()  # Newest first
+        if any(len(repo.commit(sha).parents) != 1 for sha in ordered):
+            return "❌ Merge and root commits cannot be reverted here."
+        if repo.is_dirty():
+            return "❌ The working tree has uncommitted changes; commit or stash them first."
+
+        ok, conflicts = predict_revert_conflicts(ordered)
+        if not ok:
+            err = "❌ Nothing was reverted; these commits would conflict with the current branch:\n" + "\n".join(
+                f"- `{sha[:7]}`: {', '.join(paths) or 'unknown files'}" for sha, paths in conflicts.items())
+            write_log(err, commit=" ".join(ordered), ok=False)
+            return err
+
+        try:
+            repo.git.revert("--no-commit", *ordered)
+        except GitCommandError:
+            repo.git.revert("--abort")
+            raise
+        if not repo.index.diff("HEAD"):
+            repo.git.revert("--abort")
+            return "ℹ️ These commits cancel out on the current branch; there is nothing to revert."
+        if len(ordered) == 1:
+            commit_msg = f"Revert commit {ordered[0]}"
+        else:
+            commit_msg = f"Revert {len(ordered)} commits\n\n" + "\n".join(
+                f"Reverts {sha} {repo.commit(sha).summary}" for sha in ordered)
+        repo.git.commit("-m", commit_msg)
 
-        result = f"✅ Reverted commit {commit_hexsha[:7]}"
+        short = ", ".join(sha[:7] for sha in ordered)
+        result = f"✅ Reverted commit {short}" if len(ordered) == 1 else f"✅ Reverted {len(ordered)} commits ({short}) in one commit"
 
         if tag_name:
             repo.create_tag(tag_name)
@@ -45,47 +197,205 @@ def revert_commit(commit_hexsha, tag_name=None):
         if tag_name:
             origin.push(tag_name)
 
-        write_log(result)
+        write_log(result, commit=" ".join(ordered))
         return result
     except GitCommandError as e:
         err = f"❌ Revert error: {str(e)}"
-        write_log(err)
+        write_log(err, commit=" ".join(shas), ok=False)
         return err
 
+def revert_commit(commit_hexsha, tag_name=None):
+    return revert_commits([commit_hexsha], tag_name)
+
+def resolve_revert_targets(text):
+    """
+    Commits named in a revert request: hashes and ranges `old..new` (as in
+    git, `old` itself is not included). Returns (shas or None, error message).
+    """
+    shas = []
+    for word in text.split():
+        word = word.strip(",")
+        if ".." in word:
+            ends = []
+            for prefix in word.split("..", 1):
+                sha, error = commit_index.resolve(prefix)
+                if not sha:
+                    return None, error
+                ends.append(sha)
+            shas += repo.git.rev_list(f"{ends[0]}..{ends[1]}").split()
+        elif len(word) >= 6 and all(c in "0123456789abcdef" for c in word.lower()):
+            sha, error = commit_index.resolve(word)
+            if not sha:
+                return None, error
+            shas.append(sha)
+    if not shas:
+        return None, "❗ Please specify a valid commit hash to revert, several hashes, or a range `old..new`."
+    return list(dict.fromkeys(shas)), ""
+
+def _diff_base(sha):
+    """Arguments that diff a commit against its first parent (or the empty tree for a root commit)"""
+    commit = repo.commit(sha)
+    return [commit.parents[0].hexsha, sha] if commit.parents else ["--root", sha]
+
+@st.cache_data(max_entries=64)
+def get_diff_summary(sha):
+    """Per-file [{path, adds, deletes, binary}] of a commit from one `git diff-tree --numstat`; cached by sha"""
+    output = repo.git.diff_tree("-r", "--numstat", "-z", "--no-commit-id", *_diff_base(sha))
+    files = []
+    for record in output.split("\0"):
+        parts = record.split("\t")
+        if len(parts) != 3:
+            continue
+        adds, deletes, path = parts
+        binary = adds == "-"
+        files.append({"path": path, "adds": 0 if binary else int(adds), "deletes": 0 if binary else int(deletes),
+                      "binary": binary})
+    return files
+
+@st.cache_data(max_entries=256)
+def get_file_patch(sha, path, max_bytes=PATCH_MAX_BYTES):
+    """
+    Patch of one file in a commit, read from git's output stream and cut at
+    `max_bytes` (git is stopped there). Returns (text, truncated); cached by sha and path.
+    """
+    process = repo.git.diff_tree("-r", "-p", "--no-commit-id", *_diff_base(sha), "--", path, as_process=True)
+    try:
+        data = process.proc.stdout.read(max_bytes + 1)
+    finally:
+        process.proc.kill()
+        process.proc.wait()
+    truncated = len(data) > max_bytes
+    return data[:max_bytes].decode("utf-8", errors="replace"), truncated
+
 def get_commit_diff_preview(commit):
-    parent = commit.parents[0] if commit.parents else None
-    if not parent:
-        return "This is the initial commit—no parent to diff."
-    diff = parent.diff(commit, create_patch=True)
-    preview = ""
-    for d in diff:
+    """Markdown summary of a commit's changes: one row per file, no patch text"""
+    files = get_diff_summary(commit.hexsha)
+    if not files:
+        return "No diff found."
+    adds = sum(f["adds"] for f in files)
+    deletes = sum(f["deletes"] for f in files)
+    rows = [f"**{len(files)} file(s), +{adds} −{deletes}**\n\n| File | + | − |\n|---|---|---|\n"]
+    rows += [f"| `{f['path']}` | {'binary' if f['binary'] else f['adds']} | {'' if f['binary'] else f['deletes']} |\n"
+             for f in files[:DIFF_FILES_SHOWN]]
+    if len(files) > DIFF_FILES_SHOWN:
+        rows.append(f"\n_{len(files) - DIFF_FILES_SHOWN} more file(s) not listed._\n")
+    return "".join(rows)
+
+def show_diff_panel(sha):
+    """Per-file expanders; a file's patch is only read from git when its toggle is switched on"""
+    st.subheader(f"🔍 Changes in `{sha[:7]}`")
+    for i, f in enumerate(get_diff_summary(sha)[:DIFF_FILES_SHOWN]):
+        label = f"{f['path']} (binary)" if f["binary"] else f"{f['path']} (+{f['adds']} −{f['deletes']})"
+        with st.expander(label):
+            if f["binary"]:
+                st.caption("Binary file; no patch to show.")
+            elif st.toggle("Load patch", key=f"patch_{sha}_{i}"):
+                patch, truncated = get_file_patch(sha, f["path"])
+                st.code(patch, language="diff")
+                if truncated:
+                    st.caption(f"Patch cut at {PATCH_MAX_BYTES // 1024} KB.")
+
+def list_commits(cursor=0):
+    """One page of history starting at `cursor`; returns (lines, next cursor or None)"""
+    entries, next_cursor = commit_index.page(cursor)
+    commit_list = [f"🔸 `{e['sha'][:7]}` - {e['summary']} by *{e['author']}* on {e['date']}" for e in entries]
+    if next_cursor is not None:
+        commit_list.append(f"\n_Commits {cursor + 1}–{next_cursor}; type `more commits` for the next page._")
+    return commit_list, next_cursor
+
+def _tail_lines(path, count, block_size=8192):
+    """
+    Last `count` lines of a file. Blocks are read backward from the end until
+    enough lines are found, so the cost does not grow with the file size.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.splitlines()
+    if position > 0:
+        lines = lines[1:]  # Starts mid-line
+    return lines[-count:]
+
+def tail_log(count=LOGS_SHOWN):
+    """Last `count` entries, oldest first; reaches into rotated files when the current one has fewer"""
+    lines = []
+    for path in [LOG_FILE] + [f"{LOG_FILE}.{i}" for i in range(1, LOG_BACKUPS + 1)]:
+        if len(lines) >= count:
+            break
+        lines = _tail_lines(path, count - len(lines)) + lines
+    entries = []
+    for line in lines:
         try:
-            preview += d.diff.decode("utf-8", errors="ignore") + "\n"
-        except:
-            continue
-    return preview if preview else "No diff found."
-
-def list_commits():
-    commit_list = []
-    for commit in commits:
-        short_sha = commit.hexsha[:7]
-        msg = commit.message.strip().split("\n")[0]
-        author = commit.author.name
-        date = commit.committed_datetime.strftime('%Y-%m-%d %H:%M:%S')
-        commit_list.append(f"🔸 `{short_sha}` - {msg} by *{author}* on {date}")
-    return commit_list
+            entries.append(json.loads(line.decode("utf-8")))
+        except ValueError:
+            continue  # A line cut short by a crash
+    return entries
 
-def show_logs():
+def migrate_legacy_log():
+    """
+    Convert the old text log (entries start with "[YYYY-mm-dd HH:MM:SS] ",
+    git errors continue over several lines) into LOG_FILE, ahead of any
+    entries already there. The old file is tracked, so it stays where it is;
+    a LEGACY_MIGRATED marker next to LOG_FILE makes this run once.
+    """
+    if not os.path.exists(LEGACY_LOG_FILE) or os.path.exists(LEGACY_MIGRATED):
+        return 0
+    with open(LEGACY_LOG_FILE, "rb") as f:
+        raw = f.read()
+    text = raw.decode(chardet.detect(raw)["encoding"] or "utf-8", errors="replace")
+    entries = []
+    for line in text.splitlines():
+        if line.startswith("[") and line[20:22] == "] ":
+            try:
+                stamp = datetime.datetime.strptime(line[1:20], "%Y-%m-%d %H:%M:%S").isoformat()
+            except ValueError:
+                stamp = None
+            if stamp:
+                message = line[22:]
+                entries.append({"time": stamp, "status": "error" if message.startswith("❌") else "ok",
+                                "action": "revert", "commit": None, "message": message})
+                continue
+        if entries:
+            entries[-1]["message"] += "\n" + line
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+    current = ""
     if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, 'rb') as f:
-            raw = f.read()
-            result = chardet.detect(raw)
-            encoding = result['encoding']
+        with open(LOG_FILE, encoding="utf-8") as f:
+            current = f.read()
+    with open(LOG_FILE + ".tmp", "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries) + current)
+    os.replace(LOG_FILE + ".tmp", LOG_FILE)
+    with open(LEGACY_MIGRATED, "w", encoding="utf-8") as f:
+        f.write(f"{len(entries)} entries imported from {LEGACY_LOG_FILE}\n")
+    return len(entries)
 
-        with open(LOG_FILE, 'r', encoding=encoding) as f:
-            return f.readlines()[-50:]
-    else:
+def chat_command(text):
+    """
+    (command, text after the command word) of a chat message: "please find
+    login fix" -> ("search", "login fix"), "show me the log" -> ("log", "");
+    (None, text) if no command word is found.
+    """
+    words = text.split()
+    for i, word in enumerate(words):
+        command = COMMAND_WORDS.get(word.lower().strip("`'\",.?!:"))
+        if command:
+            return command, " ".join(words[i + 1:])
+    return None, text
+
+def show_logs():
+    entries = tail_log()
+    if not entries:
         return ["No revert logs found."]
+    return [f"`{e['time']}` {e['message']}".replace("\n", "\n  ") for e in entries]
+
+migrate_legacy_log()
 
 # --- AI Chat Agent UI ---
 if "chat_history" not in st.session_state:
@@ -104,26 +414,52 @@ if user_input:
     response = ""
 
     # Commands
-    if "commit" in user_input.lower():
-        response = "\n".join(list_commits())
-    elif "log" in user_input.lower() or "history" in user_input.lower():
-        response = "\n".join([f"- {log.strip()}" for log in show_logs()])
-    elif "revert" in user_input.lower():
-        # Extract commit ID
+    command, arguments = chat_command(user_input)
+    if command == "search":
+        query = arguments
+        search_index = get_search_index(REPO_PATH)
+        with st.spinner("Updating the commit index..."):
+            search_index.update(BRANCH)
+        results = search_index.search(query)
+        if results:
+            response = "\n".join(f"🔸 `{e['sha'][:7]}` - {e['summary']} by *{e['author']}* on {e['date']}" for e in results)
+        else:
+            response = f"No commits match `{query}`."
+    elif command == "diff":
         words = user_input.strip().split()
         commit_id = next((word for word in words if len(word) >= 6 and all(c in "0123456789abcdef" for c in word.lower())), None)
-        if commit_id:
-            # Find full hash from list
-            target_commit = next((c for c in commits if c.hexsha.startswith(commit_id)), None)
-            if target_commit:
-                response = revert_commit(target_commit.hexsha)
-            else:
-                response = f"❌ Commit `{commit_id}` not found in last 20."
+        target_sha, error = commit_index.resolve(commit_id) if commit_id else (None, "❗ Please specify a commit hash, e.g. `diff abc123`.")
+        if target_sha:
+            st.session_state.diff_sha = target_sha
+            response = f"Changes in `{target_sha[:7]}`:\n\n" + get_commit_diff_preview(repo.commit(target_sha))
         else:
-            response = "❗ Please specify a valid commit hash to revert."
+            response = error
+    elif command == "commits":
+        # "more commits" continues from the saved (head, position) cursor; a new head starts over
+        cursor = (commit_index.head_sha, 0)
+        if "more" in user_input.lower() and "commit_cursor" in st.session_state:
+            cursor = st.session_state.commit_cursor  # None once the end was shown
+            if cursor and cursor[0] != commit_index.head_sha:
+                cursor = (commit_index.head_sha, 0)
+        if cursor is None:
+            response = "No more commits."
+        else:
+            lines, next_cursor = list_commits(cursor[1])
+            st.session_state.commit_cursor = (commit_index.head_sha, next_cursor) if next_cursor is not None else None
+            response = "\n".join(lines)
+    elif command == "log":
+        response = "\n".join([f"- {log}" for log in show_logs()])
+    elif command == "revert":
+        # Commit ids and ranges anywhere in the branch history
+        target_shas, error = resolve_revert_targets(user_input)
+        response = revert_commits(target_shas) if target_shas else error
     else:
-        response = "🤖 I can help with:\n- `show commits`\n- `revert abc123`\n- `show log`"
+        response = "🤖 I can help with:\n- `show commits` (then `more commits`)\n- `search EmployeeController`, `search author:bharath last tuesday`\n- `diff abc123`\n- `revert abc123` (or `revert abc123 def456`, `revert abc123..def456`)\n- `show log`"
 
     st.session_state.chat_history.append(("assistant", response))
     with st.chat_message("assistant"):
         st.markdown(response)
+
+# --- Diff panel of the last `diff` command ---
+if st.session_state.get("diff_sha"):
+    show_diff_panel(st.session_state.diff_sha)
@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import PIPELINE_MAX_WORKERS, MAX_CONCURRENT_PIPELINES
+from tracing import span, copy_context
+
+TIMELINE_WIDTH = 30  # Characters of the text timeline bar
+
+# Shared by every session of the Streamlit server (modules are imported once)
+PIPELINE_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_PIPELINES)
+
+class Pipeline:
+    """
+    A set of named steps with dependencies, run on a thread pool. A step
+    starts as soon as all of its dependencies succeeded; if one of them failed
+    or was skipped, the step is skipped, which is how gates such as "no commit
+    without green tests" are enforced.
+
+    Step functions take the shared context dict (earlier steps' values keyed
+    by step name) and return (ok, value), the repo's usual success tuple.
+    """
+
+    def __init__(self, max_workers=PIPELINE_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.steps = {}  # name -> {"func", "deps", "label"}
+        self.timeline = {}  # name -> {"label", "status", "start", "end", "message"}
+        self.context = {}
+        self.start_time = None
+
+    def add(self, name, func, deps=(), label=None):
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+        self.steps[name] = {"func": func, "deps": tuple(deps), "label": label or name}
+        self.timeline[name] = {"label": label or name, "status": "pending", "start": None, "end": None, "message": ""}
+
+    def _run_step(self, name):
+        entry = self.timeline[name]
+        entry["start"] = time.time() - self.start_time
+        entry["status"] = "running"
+        with span(self.steps[name]["label"], step=name) as step_span:
+            try:
+                ok, value = self.steps[name]["func"](self.context)
+            except Exception as e:
+                ok, value = False, f"{type(e).__name__}: {e}"
+            if step_span is not None and not ok:
+                step_span.set_error(value)
+        entry["end"] = time.time() - self.start_time
+        return ok, value
+
+    def elapsed(self):
+        return time.time() - self.start_time if self.start_time else 0.0
+
+    def run(self, on_update=None, poll_interval=0.5):
+        """
+        Run every step, calling `on_update(timeline, elapsed)` from this thread
+        while they run. Returns True when all steps succeeded.
+        """
+        self.start_time = time.time()
+        initializer = _streamlit_thread_initializer()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, initializer=initializer) as executor:
+            while True:
+                for name, step in self.steps.items():
+                    entry = self.timeline[name]
+                    if entry["status"] != "pending":
+                        continue
+                    dep_states = [self.timeline[dep]["status"] for dep in step["deps"]]
+                    if any(state in ("failed", "skipped") for state in dep_states):
+                        blocked = [self.timeline[dep]["label"] for dep in step["deps"]
+                                   if self.timeline[dep]["status"] in ("failed", "skipped")]
+                        entry.update(status="skipped", message=f"needs {', '.join(blocked)}")
+                    elif all(state == "done" for state in dep_states):
+                        entry["status"] = "queued"
+                        # Each step runs in a copy of this context so its spans nest under the caller's
+                        running[executor.submit(copy_context().run, self._run_step, name)] = name
+
+                if not running:
+                    if any(e["status"] == "pending" for e in self.timeline.values()):
+                        continue  # Skips were just propagated; re-scan
+                    break
+                finished, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    ok, value = future.result()
+                    if ok:
+                        self.context[name] = value
+                        self.timeline[name]["status"] = "done"
+                    else:
+                        self.timeline[name].update(status="failed", message=str(value))
+                if on_update:
+                    on_update(self.timeline, self.elapsed())
+        if on_update:
+            on_update(self.timeline, self.elapsed())
+        return all(e["status"] == "done" for e in self.timeline.values())
+
+def acquire_pipeline_slot(on_wait=None, poll_interval=1.0):
+    """
+    Block until fewer than MAX_CONCURRENT_PIPELINES pipelines are running;
+    `on_wait(seconds_waited)` is called while waiting. Release with
+    PIPELINE_SLOTS.release().
+    """
+    start = time.time()
+    while not PIPELINE_SLOTS.acquire(timeout=poll_interval):
+        if on_wait:
+            on_wait(time.time() - start)
+
+def _streamlit_thread_initializer():
+    """Attach the current Streamlit script context to pool threads so steps can use st.*"""
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+def format_timeline(timeline, elapsed=None, width=TIMELINE_WIDTH):
+    """Markdown table with one text bar per step on a shared time axis"""
+    now = elapsed if elapsed is not None else max((e["end"] or e["start"] or 0.0 for e in timeline.values()), default=0.0)
+    total = max(now, 0.001)
+    icons = {"done": "✅", "failed": "❌", "skipped": "⏭️", "running": "⏳", "queued": "⏳", "pending": "·"}
+    md = f"| Stage | Status | Start | Time | Timeline (0–{total:.1f}s) |\n|---|---|---|---|---|\n"
+    for entry in timeline.values():
+        start, end = entry["start"], entry["end"]
+        if start is None:
+            bar, start_text, duration_text = "", "-", "-"
+        else:
+            end = end if end is not None else now
+            offset = int(start / total * width)
+            length = max(1, round((end - start) / total * width))
+            bar = "`" + "░" * offset + "█" * length + "░" * max(0, width - offset - length) + "`"
+            start_text, duration_text = f"{start:.1f}s", f"{end - start:.1f}s"
+        status = f"{icons.get(entry['status'], '')} {entry['status']}"
+        if entry["message"] and entry["status"] in ("failed", "skipped"):
+            status += f" ({entry['message'][:80]})"
+        md += f"| {entry['label']} | {status} | {start_text} | {duration_text} | {bar} |\n"
+    return md
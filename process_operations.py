@@ -1,12 +1,37 @@
+import json
+import os
 import subprocess
 import platform
+import psutil
+import queue
 import socket
+import threading
 import time
 import shlex
+import shutil
+import sys
 import streamlit as st
+from collections import deque
 from pathlib import Path
-from config import PROJECT_ROOT
+from config import (PROJECT_ROOT, AUTODEV_STATE_DIR, ROBOT_WORKERS, BROWSER_POOL_SIZE, BROWSER_PROFILE,
+                    ROBOT_KEYWORD_PROFILING, ROBOT_RERUN_RETRIES, ROBOT_RUNS_KEPT, relative_robot_path_str,
+                    ROBOT_OUTPUT_TAIL_KB, ROBOT_OUTPUT_UPDATE_INTERVAL)
+from robot_scheduling import (discover_robot_tests, load_duration_history,
+                              schedule_longest_first, update_duration_history)
+from robot_results import read_test_results, merge_rerun_results
+from robot_profiler import PROFILE_JSON, merge_profiles, write_profile
+from robot_cache import compute_cache_key, load_cached_run, store_cached_run
+from tracing import traced
 
+MAX_TEST_TIME = 300  # 5 minutes timeout for tests
+ROBOT_CONSOLE_LOG = AUTODEV_STATE_DIR / "robot_console.log"  # Full console output of the latest run
+BROWSER_POOL_REGISTRY = AUTODEV_STATE_DIR / "browser_pool.json"
+PROFILER_LISTENER = Path(__file__).resolve().with_name("robot_profiler.py")
+SHARD_COMBINER = Path(__file__).resolve().with_name("robot_shard_combiner.py")
+ROBOT_RUNS_DIR = AUTODEV_STATE_DIR / "runs"  # One output directory per pipeline run
+RUN_ACTIVE_MARKER = ".active"  # Pid of the server running into a run directory; removed when the run ends
+
+@traced()
 def check_port(host="127.0.0.1", port=8081, retries=30, delay=2):
     """Check if a port is open and accepting connections"""
     st.write(f"Checking if port {host}:{port} is open...")
@@ -23,6 +48,45 @@ def check_port(host="127.0.0.1", port=8081, retries=30, delay=2):
             time.sleep(delay)
     return False
 
+def find_free_port(host="127.0.0.1"):
+    """An ephemeral port that is free right now, for one pipeline's app instance"""
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+def _run_dir_live(run_dir):
+    """Whether a run still writes to `run_dir`: its marker exists and names a live process"""
+    try:
+        return psutil.pid_exists(int((run_dir / RUN_ACTIVE_MARKER).read_text()))
+    except (FileNotFoundError, ValueError):
+        return False
+
+def create_run_dir(label):
+    """
+    Fresh output directory for one pipeline run under ROBOT_RUNS_DIR, marked
+    live until finish_run_dir; old runs are pruned, except ones still live.
+    """
+    run_dir = ROBOT_RUNS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{label}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / RUN_ACTIVE_MARKER).write_text(str(os.getpid()))
+    runs = sorted((d for d in ROBOT_RUNS_DIR.iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime, reverse=True)
+    for stale in runs[ROBOT_RUNS_KEPT:]:
+        if not _run_dir_live(stale):
+            shutil.rmtree(stale, ignore_errors=True)
+    return run_dir
+
+def finish_run_dir(run_dir):
+    """Drop the live marker so the run directory can be pruned"""
+    (Path(run_dir) / RUN_ACTIVE_MARKER).unlink(missing_ok=True)
+
+def latest_run_output(exclude=None):
+    """output.xml of the most recent pipeline run (other than `exclude`), or None"""
+    if not ROBOT_RUNS_DIR.is_dir():
+        return None
+    outputs = [d / "output.xml" for d in ROBOT_RUNS_DIR.iterdir()
+               if d.is_dir() and d != exclude and (d / "output.xml").exists()]
+    return max(outputs, key=lambda p: p.stat().st_mtime, default=None)
+
 def run_command_separate_terminal(command_list, cwd):
     """Run command in a new terminal window"""
     if not Path(cwd).resolve().is_relative_to(PROJECT_ROOT.resolve()):
@@ -48,28 +112,201 @@ def run_command_separate_terminal(command_list, cwd):
         st.error(f"Failed to start command in new terminal: {e}")
         return False
 
-def run_robot_tests(test_path, cwd):
-    """Run Robot Framework tests"""
-    if not isinstance(test_path, Path):
-        test_path = Path(test_path)
+@traced()
+def ensure_browser_pool(size=BROWSER_POOL_SIZE, profile=BROWSER_PROFILE, timeout=60):
+    """
+    Make sure the pool of pre-launched headless browsers (run by
+    webdriver_setup.py) is up with at least `size` sessions of `profile`
+    ("normal" pools run headless, since pooled browsers are never shown). A
+    pool that is too small or has another profile is replaced, but not while
+    a Robot process still holds one of its browsers. Returns the registry
+    path to pass to Robot, or None when pooling is off or failed.
+    """
+    if size <= 0:
+        return None
+    pool_profile = "headless" if profile == "normal" else profile
 
-    if not test_path.exists():
-        err_msg = f"Robot test path does not exist: {test_path}"
-        st.error(err_msg)
-        return False, f"ERROR: {err_msg}"
+    try:
+        registry = json.loads(BROWSER_POOL_REGISTRY.read_text(encoding='utf-8'))
+        if (psutil.pid_exists(registry["owner_pid"]) and len(registry["sessions"]) >= size
+                and registry.get("profile", "headless") == pool_profile):
+            return BROWSER_POOL_REGISTRY
+        if psutil.pid_exists(registry["owner_pid"]):
+            leased = [entry for entry in registry["sessions"]
+                      if entry.get("leased_by") and psutil.pid_exists(entry["leased_by"])]
+            if leased:
+                # Another run is using it; a smaller pool of the right profile still helps, leases fall back when it is full
+                if registry.get("profile", "headless") == pool_profile:
+                    return BROWSER_POOL_REGISTRY
+                st.warning(f"Browser pool has another profile and {len(leased)} browser(s) in use; "
+                           "tests will launch their own browser.")
+                return None
+            psutil.Process(registry["owner_pid"]).terminate()  # Too small or another profile; replace it
+    except (FileNotFoundError, ValueError, KeyError, psutil.Error):
+        pass
+
+    BROWSER_POOL_REGISTRY.parent.mkdir(parents=True, exist_ok=True)
+    BROWSER_POOL_REGISTRY.unlink(missing_ok=True)
+    pool_log = open(AUTODEV_STATE_DIR / "browser_pool.log", 'w')
+    process = subprocess.Popen(
+        [sys.executable, str(PROJECT_ROOT / relative_robot_path_str / "webdriver_setup.py"),
+         "pool", "--size", str(size), "--registry", str(BROWSER_POOL_REGISTRY), "--profile", pool_profile],
+        cwd=str(PROJECT_ROOT / relative_robot_path_str),
+        stdout=pool_log,
+        stderr=subprocess.STDOUT
+    )
+    pool_log.close()
+
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        if BROWSER_POOL_REGISTRY.exists():
+            return BROWSER_POOL_REGISTRY
+        if process.poll() is not None:
+            st.warning(f"Browser pool exited early (see {AUTODEV_STATE_DIR / 'browser_pool.log'}); tests will launch their own browser.")
+            return None
+        time.sleep(0.2)
+    st.warning("Browser pool did not start in time; tests will launch their own browser.")
+    return None
+
+def validate_test_run(test_path, cwd):
+    """Return an error message if the test path or CWD cannot be used, else None"""
+    if not Path(test_path).exists():
+        return f"Robot test path does not exist: {test_path}"
 
     if not Path(cwd).resolve().is_relative_to(PROJECT_ROOT.resolve()):
-        err_msg = f"Security Error: Attempting to run tests outside project root CWD: {cwd}"
+        return f"Security Error: Attempting to run tests outside project root CWD: {cwd}"
+    return None
+
+def run_robot_tests(test_path, cwd, rerun_failed=False, retries=ROBOT_RERUN_RETRIES):
+    """
+    Run Robot Framework tests. With `rerun_failed`, only the failures of the
+    previous output.xml are retried (up to `retries` times) and merged into it.
+    Returns: (success_bool, full_output_str)
+    """
+    if not isinstance(test_path, Path):
+        test_path = Path(test_path)
+
+    err_msg = validate_test_run(test_path, cwd)
+    if err_msg:
         st.error(err_msg)
         return False, f"ERROR: {err_msg}"
 
+    if rerun_failed:
+        success, output, _ = rerun_failed_tests(test_path, cwd, retries)
+        return success, output
     return execute_robot_tests(test_path, cwd)
 
-def execute_robot_tests(test_path, cwd):
-    """Execute Robot Framework tests with proper output handling"""
-    command = ["robot", str(test_path)]
+def profiler_args():
+    """robot arguments that attach the keyword profiling listener, if enabled"""
+    return ["--listener", str(PROFILER_LISTENER)] if ROBOT_KEYWORD_PROFILING else []
+
+def terminate_process(process):
+    """Terminate a process, killing it if it does not exit promptly"""
+    if process.poll() is None:
+        process.terminate()
+        time.sleep(0.5)
+        if process.poll() is None:
+            process.kill()
+
+class OutputTail:
+    """Ring buffer that keeps only the last `max_bytes` of streamed output lines"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.lines = deque()
+        self.size = 0
+        self.dropped_lines = 0
+
+    def append(self, line):
+        self.lines.append(line)
+        self.size += len(line.encode('utf-8', errors='replace'))
+        while self.size > self.max_bytes and len(self.lines) > 1:
+            self.size -= len(self.lines.popleft().encode('utf-8', errors='replace'))
+            self.dropped_lines += 1
+
+    def text(self):
+        return "".join(self.lines)
+
+def _pump_lines(stream, line_queue):
+    """Reader thread: forward lines from a pipe to a queue, then an EOF marker"""
+    try:
+        for line in iter(stream.readline, ''):
+            line_queue.put(line)
+    finally:
+        line_queue.put(None)
+
+def read_file_tail(path, max_bytes):
+    """Last `max_bytes` of a text file, without reading the whole file"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(0, size - max_bytes))
+            return f.read().decode('utf-8', errors='replace')
+    except OSError:
+        return ""
+
+def handle_test_output(process, timeout=MAX_TEST_TIME, spill_path=None, on_output=None):
+    """
+    Stream test process output until it exits or the timeout expires. A reader
+    thread drains the pipe; every line is appended to `spill_path` on disk while
+    only the last ROBOT_OUTPUT_TAIL_KB stay in memory. `on_output(tail_text)` is
+    called at most every ROBOT_OUTPUT_UPDATE_INTERVAL seconds while lines arrive.
+    Returns the in-memory tail of the output.
+    """
+    tail = OutputTail(ROBOT_OUTPUT_TAIL_KB * 1024)
+    line_queue = queue.Queue()
+    reader = threading.Thread(target=_pump_lines, args=(process.stdout, line_queue), daemon=True)
+    reader.start()
+
+    spill_file = open(spill_path, 'w', encoding='utf-8', errors='replace') if spill_path else None
+    start_time = time.time()
+    last_update = 0.0
+    pending_update = False
+    try:
+        while True:
+            if time.time() - start_time > timeout:
+                st.warning(f"Robot test execution timed out after {timeout} seconds.")
+                terminate_process(process)
+                tail.append("\n\nERROR: Test execution timed out.\n")
+                break
+
+            try:
+                line = line_queue.get(timeout=ROBOT_OUTPUT_UPDATE_INTERVAL)
+            except queue.Empty:
+                line = ""
+            if line is None:  # Reader reached EOF
+                break
+            if line:
+                tail.append(line)
+                if spill_file:
+                    spill_file.write(line)
+                pending_update = True
+
+            now = time.time()
+            if on_output and pending_update and now - last_update >= ROBOT_OUTPUT_UPDATE_INTERVAL:
+                on_output(tail.text())
+                last_update = now
+                pending_update = False
+    finally:
+        if spill_file:
+            spill_file.close()
+
+    if on_output and pending_update:
+        on_output(tail.text())
+    output = tail.text()
+    if tail.dropped_lines:
+        where = f" (full output: {spill_path})" if spill_path else ""
+        output = f"[... {tail.dropped_lines} earlier lines omitted{where} ...]\n" + output
+    return output
+
+@traced()
+def execute_robot_tests(test_path, cwd, extra_args=None, on_output=None, console_log=ROBOT_CONSOLE_LOG):
+    """Execute Robot Framework tests, streaming console output live and to `console_log`"""
+    command = ["robot"] + profiler_args() + list(extra_args or []) + [str(test_path)]
     st.info(f"Running Robot tests: `{' '.join(command)}` in `{cwd}`")
-    
+    full_output = f"--- Robot Test Log: {' '.join(command)} ---\n\n"
+
     process = None
     try:
         process = subprocess.Popen(
@@ -83,13 +320,281 @@ def execute_robot_tests(test_path, cwd):
             bufsize=1
         )
 
-        output = handle_test_output(process)
-        return_code = process.wait(timeout=5)
+        Path(console_log).parent.mkdir(parents=True, exist_ok=True)
+        full_output += handle_test_output(process, spill_path=console_log, on_output=on_output)
+        if process.poll() is None:
+            process.wait(timeout=5)
+
+        return_code = process.returncode
         success = return_code == 0
-        
-        return success, output
+        full_output += f"\n--- Test Execution {'Complete' if success else 'Failed'} (Exit Code: {return_code}) ---"
+        return success, full_output
+    except FileNotFoundError:
+        err_msg = "Error: 'robot' command not found. Is Robot Framework installed and in PATH?"
+        st.error(err_msg)
+        return False, full_output + f"\nERROR: {err_msg}"
+    except subprocess.TimeoutExpired:
+        st.error("Robot test process timed out waiting for completion after output.")
+        return False, full_output + "\n\nERROR: Process timed out after output reading."
     except Exception as e:
-        return False, f"Error executing tests: {str(e)}"
+        err_msg = f"An error occurred while running Robot tests: {e}"
+        st.error(err_msg)
+        return False, full_output + f"\nERROR: {err_msg}"
     finally:
         if process and process.poll() is None:
-            process.terminate()
\ No newline at end of file
+            try:
+                terminate_process(process)
+            except Exception as kill_e:
+                st.warning(f"Error terminating robot process: {kill_e}")
+
+@traced()
+def execute_robot_shards(test_path, cwd, shards, timeout=MAX_TEST_TIME, on_output=None, extra_args=None,
+                         output_dir=None):
+    """
+    Run each shard of test names as its own robot process and combine the
+    shard outputs into output.xml/log.html/report.html in `output_dir`
+    (default `cwd`). The shards run at the same time against the one app
+    instance, so tests must not depend on state other shards change.
+    Returns: (success_bool, full_output_str)
+    """
+    output_dir = Path(output_dir or cwd)
+    shard_root = (output_dir if output_dir != Path(cwd) else AUTODEV_STATE_DIR) / "shards"
+    shard_tail_bytes = ROBOT_OUTPUT_TAIL_KB * 1024 // len(shards)
+    processes = []
+    full_output = f"--- Robot Test Log: {len(shards)} shards of {test_path} ---\n\n"
+
+    try:
+        for i, shard in enumerate(shards, 1):
+            shard_dir = shard_root / f"shard-{i}"
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            (shard_dir / "output.xml").unlink(missing_ok=True)
+            (shard_dir / PROFILE_JSON).unlink(missing_ok=True)
+
+            command = ["robot", "--outputdir", str(shard_dir), "--log", "NONE", "--report", "NONE"]
+            command += profiler_args()
+            command += list(extra_args or [])
+            for test_name in shard:
+                command += ["--test", test_name]
+            command.append(str(test_path))
+
+            console = open(shard_dir / "console.txt", "w", encoding="utf-8", errors="replace")
+            try:
+                process = subprocess.Popen(command, cwd=cwd, stdout=console, stderr=subprocess.STDOUT)
+            except Exception:
+                console.close()
+                raise
+            processes.append((shard_dir, console, process))
+        st.info(f"Running {len(processes)} Robot shards in parallel in `{cwd}`")
+
+        start_time = time.time()
+        last_update = 0.0
+        timed_out = False
+        while any(process.poll() is None for _, _, process in processes):
+            if time.time() - start_time > timeout:
+                st.warning(f"Robot test execution timed out after {timeout} seconds.")
+                for _, _, process in processes:
+                    terminate_process(process)
+                timed_out = True
+                break
+            if on_output and time.time() - last_update >= ROBOT_OUTPUT_UPDATE_INTERVAL:
+                on_output("".join(f"--- Shard {i} ---\n{read_file_tail(shard_dir / 'console.txt', shard_tail_bytes)}\n"
+                                  for i, (shard_dir, _, _) in enumerate(processes, 1)))
+                last_update = time.time()
+            time.sleep(0.1)
+    except FileNotFoundError:
+        err_msg = "Error: 'robot' command not found. Is Robot Framework installed and in PATH?"
+        st.error(err_msg)
+        return False, full_output + f"\nERROR: {err_msg}"
+    finally:
+        for _, console, process in processes:
+            if process.poll() is None:
+                terminate_process(process)
+            console.close()
+
+    success = not timed_out
+    shard_outputs = []
+    for i, (shard_dir, _, process) in enumerate(processes, 1):
+        full_output += f"--- Shard {i} (Exit Code: {process.returncode}) ---\n"
+        full_output += read_file_tail(shard_dir / "console.txt", shard_tail_bytes)
+        success = success and process.returncode == 0
+        if (shard_dir / "output.xml").exists():
+            shard_outputs.append(str(shard_dir / "output.xml"))
+
+    if timed_out:
+        full_output += "\n\nERROR: Test execution timed out.\n"
+    if shard_outputs:
+        # Shards hold disjoint tests: combine them (--merge is for reruns of the same tests)
+        combine = subprocess.run(
+            ["rebot", "--prerebotmodifier", str(SHARD_COMBINER), "--outputdir", str(output_dir),
+             "--output", "output.xml"] + shard_outputs,
+            cwd=cwd, capture_output=True, text=True, encoding='utf-8', errors='replace'
+        )
+        full_output += f"\n--- Combined shard results ---\n{combine.stdout}{combine.stderr}"
+    shard_profiles = [shard_dir / PROFILE_JSON for shard_dir, _, _ in processes if (shard_dir / PROFILE_JSON).exists()]
+    (output_dir / PROFILE_JSON).unlink(missing_ok=True)
+    if shard_profiles:
+        write_profile(merge_profiles(shard_profiles), output_dir)
+    full_output += f"\n--- Test Execution {'Complete' if success else 'Failed'} ---"
+    return success, full_output
+
+@traced()
+def run_robot_tests_scheduled(test_path, cwd, workers=ROBOT_WORKERS, test_names=None, on_output=None, variables=None,
+                              output_dir=None):
+    """
+    Run Robot tests longest-first across `workers` shards using the per-test
+    duration history, then parse output.xml into per-test records and fold the
+    new durations back into the history. `test_names` restricts the run to a
+    subset of full test names; `on_output(tail_text)` receives throttled live
+    console output; `variables` are passed to robot as --variable NAME:value;
+    `output_dir` keeps this run's output.xml/logs apart from other runs
+    (default `cwd`).
+    Returns: (success_bool, full_output_str, run_report_dict) where the report
+    holds the schedule figures, "results" and "output_dir".
+    """
+    if not isinstance(test_path, Path):
+        test_path = Path(test_path)
+
+    output_dir = Path(output_dir or cwd)
+    report = {"workers": 1, "tests": 0, "predicted_makespan": 0.0, "actual_makespan": 0.0,
+              "results": [], "output_dir": str(output_dir)}
+    err_msg = validate_test_run(test_path, cwd)
+    if err_msg:
+        st.error(err_msg)
+        return False, f"ERROR: {err_msg}", report
+
+    history = load_duration_history()
+    subset = test_names is not None
+    test_names = list(test_names) if subset else discover_robot_tests(test_path)
+    shards, predicted_loads = schedule_longest_first(test_names, workers, history)
+    report.update(workers=max(1, len(shards)), tests=len(test_names),
+                  predicted_makespan=max(predicted_loads, default=0.0))
+
+    variable_args = robot_variable_args(variables)
+    start_time = time.time()
+    if len(shards) > 1:
+        success, output = execute_robot_shards(test_path, cwd, shards, on_output=on_output, extra_args=variable_args,
+                                               output_dir=output_dir)
+    else:
+        test_args = [arg for name in test_names for arg in ("--test", name)] if subset else []
+        console_log = ROBOT_CONSOLE_LOG
+        if output_dir != Path(cwd):
+            test_args += ["--outputdir", str(output_dir)]
+            console_log = output_dir / "console.log"
+        (output_dir / PROFILE_JSON).unlink(missing_ok=True)
+        success, output = execute_robot_tests(test_path, cwd, variable_args + test_args, on_output=on_output,
+                                              console_log=console_log)
+    report["actual_makespan"] = time.time() - start_time
+
+    output_xml = output_dir / "output.xml"
+    if output_xml.exists() and output_xml.stat().st_mtime >= start_time:
+        try:
+            report["results"] = read_test_results(output_xml)
+            update_duration_history(report["results"])
+        except Exception as e:
+            st.warning(f"Could not read Robot results from {output_xml}: {e}")
+    return success, output, report
+
+def robot_variable_args(variables):
+    """robot --variable arguments for a dict of Robot variables"""
+    return [arg for name, value in (variables or {}).items() for arg in ("--variable", f"{name}:{value}")]
+
+@traced()
+def rerun_failed_tests(test_path, cwd, retries=ROBOT_RERUN_RETRIES, on_output=None, variables=None, previous_results=None,
+                       output_dir=None, previous_output=None):
+    """
+    Rerun the failed tests of the previous output.xml (`previous_output`,
+    default output.xml in `output_dir`/`cwd`) with robot --rerunfailed up to
+    `retries` times, stopping once nothing fails, then merge all attempts into
+    output.xml/log.html/report.html in `output_dir` with rebot.
+    Returns the same triple as run_robot_tests_scheduled; results carry an
+    "outcome" (passed/flaky/failed/skipped) and success means no hard failures.
+    """
+    output_dir = Path(output_dir or cwd)
+    output_xml = Path(previous_output or output_dir / "output.xml")
+    report = {"workers": 1, "tests": 0, "predicted_makespan": 0.0, "actual_makespan": 0.0,
+              "results": [], "output_dir": str(output_dir), "reruns": 0}
+    if not output_xml.exists():
+        err_msg = f"No previous Robot results at {output_xml} to rerun."
+        st.error(err_msg)
+        return False, f"ERROR: {err_msg}", report
+
+    rerun_dir = (output_dir if output_dir != Path(cwd) else AUTODEV_STATE_DIR) / "reruns"
+    shutil.rmtree(rerun_dir, ignore_errors=True)
+    rerun_dir.mkdir(parents=True)
+    attempt_files = [rerun_dir / "attempt-0.xml"]
+    shutil.copy2(output_xml, attempt_files[0])
+    attempts = [previous_results if previous_results is not None else read_test_results(output_xml)]
+
+    full_output = ""
+    start_time = time.time()
+    for attempt in range(1, retries + 1):
+        failed = [r["name"] for r in attempts[-1] if r["status"] == "FAIL"]
+        if not failed:
+            break
+        st.info(f"Rerunning {len(failed)} failed Robot test(s), attempt {attempt}/{retries}")
+        attempt_xml = rerun_dir / f"attempt-{attempt}.xml"
+        args = robot_variable_args(variables) + [
+            "--rerunfailed", str(attempt_files[-1]), "--outputdir", str(rerun_dir),
+            "--output", attempt_xml.name, "--log", "NONE", "--report", "NONE"]
+        _, output = execute_robot_tests(test_path, cwd, args, on_output=on_output,
+                                        console_log=rerun_dir / f"console-{attempt}.log")
+        full_output += f"\n--- Rerun attempt {attempt} ---\n{output}"
+        if not attempt_xml.exists():
+            break
+        attempt_files.append(attempt_xml)
+        attempts.append(read_test_results(attempt_xml))
+    report["actual_makespan"] = time.time() - start_time
+    report["reruns"] = len(attempt_files) - 1
+
+    if report["reruns"]:
+        merge = subprocess.run(
+            ["rebot", "--merge", "--outputdir", str(output_dir), "--output", "output.xml"] + [str(f) for f in attempt_files],
+            cwd=cwd, capture_output=True, text=True, encoding='utf-8', errors='replace'
+        )
+        full_output += f"\n--- Merged rerun results ---\n{merge.stdout}{merge.stderr}"
+
+    report["results"] = merge_rerun_results(attempts)
+    report["tests"] = len(report["results"])
+    success = bool(report["results"]) and not any(r["outcome"] == "failed" for r in report["results"])
+    return success, full_output, report
+
+@traced()
+def run_robot_tests_cached(test_path, cwd, test_names=None, force=False, on_output=None, variables=None,
+                           retries=0, output_dir=None):
+    """
+    Reuse the results of an earlier passing run whose inputs hash to the
+    same cache key; otherwise run the tests and cache the outcome if it
+    passed. `force` always reruns. A failing run has its failed tests retried
+    up to `retries` times and the merged outcome is what gets returned.
+    Returns the same triple as run_robot_tests_scheduled, with "cached" and
+    "cache_key" added to the report.
+    """
+    cache_key = None
+    try:
+        cache_key = compute_cache_key(test_path, test_names, project_root=Path(cwd), variables=variables)
+    except OSError as e:
+        st.warning(f"Could not compute test cache key: {e}")
+
+    cached = load_cached_run(cache_key) if cache_key and not force else None
+    if cached:
+        report = {"workers": 0, "tests": len(cached["results"]), "predicted_makespan": 0.0,
+                  "actual_makespan": 0.0, "results": cached["results"], "output_dir": cached["output_dir"],
+                  "cached": True, "cache_key": cache_key, "cached_at": cached["created"]}
+        return cached["success"], cached.get("output", ""), report
+
+    success, output, report = run_robot_tests_scheduled(test_path, cwd, test_names=test_names, on_output=on_output,
+                                                        variables=variables, output_dir=output_dir)
+    if not success and retries and any(r["status"] == "FAIL" for r in report["results"]):
+        success, rerun_output, rerun_report = rerun_failed_tests(
+            test_path, cwd, retries, on_output=on_output, variables=variables, previous_results=report["results"],
+            output_dir=output_dir)
+        output += rerun_output
+        report.update(results=rerun_report["results"], reruns=rerun_report["reruns"],
+                      actual_makespan=report["actual_makespan"] + rerun_report["actual_makespan"])
+    report.update(cached=False, cache_key=cache_key)
+    if cache_key:
+        try:
+            store_cached_run(cache_key, success, report["results"], report["output_dir"], output[-4096:])
+        except OSError as e:
+            st.warning(f"Could not store test results in cache: {e}")
+    return success, output, report
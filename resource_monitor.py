@@ -0,0 +1,244 @@
+import json
+import statistics
+import threading
+import time
+from datetime import datetime
+import psutil
+from config import (AUTODEV_STATE_DIR, RESOURCE_SAMPLE_INTERVAL, RESOURCE_HISTORY_KEPT,
+                    RESOURCE_BASELINE_RUNS, RESOURCE_REGRESSION_FACTOR)
+
+RESOURCE_HISTORY_FILE = AUTODEV_STATE_DIR / "resource_history.jsonl"
+BROWSER_PROCESS_NAMES = ("chrome", "chromedriver", "msedge", "msedgedriver", "firefox", "geckodriver")
+ROOT_REFRESH_SAMPLES = 5  # Samples between re-resolving a group's root processes
+METRICS = ("cpu", "rss", "threads", "fds")
+
+def processes_with_arg(text, exact=False):
+    """Pids of processes with `text` in (or, with `exact`, as) a command-line argument"""
+    pids = []
+    for process in psutil.process_iter(["cmdline"]):
+        cmdline = process.info["cmdline"] or []
+        if any(arg == text if exact else text in arg for arg in cmdline):
+            pids.append(process.pid)
+    return pids
+
+def listening_pids(port):
+    """Pids listening on a local TCP port (the app's JVM once it is up)"""
+    try:
+        return [c.pid for c in psutil.net_connections(kind="tcp")
+                if c.pid and c.laddr and c.laddr.port == port and c.status == psutil.CONN_LISTEN]
+    except psutil.AccessDenied:
+        return []  # macOS needs elevated rights for other processes' sockets
+
+def pool_owner_pids(registry_path):
+    """Pid of the browser pool process recorded in its registry"""
+    try:
+        return [json.loads(registry_path.read_text(encoding="utf-8"))["owner_pid"]]
+    except (AttributeError, FileNotFoundError, ValueError, KeyError):
+        return []
+
+class ResourceMonitor:
+    """
+    Samples CPU, RSS, thread count and open file descriptors (handles on
+    Windows) of process trees on a background thread. Each group is a
+    callable returning root pids; a root's children are counted with it,
+    except browser processes (Chrome, chromedriver, ...), which always go to
+    the "browser" group so a Robot tree's browser is reported on its own.
+
+        with ResourceMonitor({"app": lambda: listening_pids(8081)}) as monitor:
+            ...
+        monitor.samples  # [{"time", "groups": {group: {"cpu", "rss", "threads", "fds", "procs"}}}]
+    """
+
+    def __init__(self, groups, interval=RESOURCE_SAMPLE_INTERVAL):
+        self.groups = groups
+        self.interval = interval
+        self.samples = []
+        self._roots = {name: [] for name in groups}
+        self._processes = {}  # pid -> psutil.Process, kept so cpu_percent measures between samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        count = 0
+        while not self._stop.is_set():
+            started = time.time()
+            self.samples.append(self.sample(refresh_roots=count % ROOT_REFRESH_SAMPLES == 0))
+            count += 1
+            self._stop.wait(max(0.0, self.interval - (time.time() - started)))
+
+    def _process(self, pid):
+        process = self._processes.get(pid)
+        if process is None:
+            process = psutil.Process(pid)
+            process.cpu_percent(None)  # The first call only sets the baseline
+            self._processes[pid] = process
+        return process
+
+    def _tree(self, root_pids):
+        processes = []
+        for pid in root_pids:
+            try:
+                root = self._process(pid)
+                processes.append(root)
+                processes += [self._process(child.pid) for child in root.children(recursive=True)]
+            except psutil.Error:
+                continue
+        return processes
+
+    def sample(self, refresh_roots=True):
+        """One measurement of every group"""
+        seen = {}  # pid -> (group, process); a process is counted once even if several roots reach it
+        for name, find_roots in self.groups.items():
+            roots = [pid for pid in self._roots[name] if psutil.pid_exists(pid)]
+            if refresh_roots or not roots:
+                try:
+                    roots = find_roots()
+                except psutil.Error:
+                    roots = []
+            self._roots[name] = roots
+            for process in self._tree(roots):
+                seen.setdefault(process.pid, (name, process))
+
+        groups = {}
+        for group, process in seen.values():
+            try:
+                with process.oneshot():
+                    if process.name().lower().removesuffix(".exe") in BROWSER_PROCESS_NAMES:
+                        group = "browser"
+                    values = {
+                        "cpu": process.cpu_percent(None),
+                        "rss": process.memory_info().rss,
+                        "threads": process.num_threads(),
+                        "fds": process.num_handles() if psutil.WINDOWS else process.num_fds(),
+                    }
+            except psutil.Error:
+                continue
+            totals = groups.setdefault(group, dict.fromkeys(METRICS, 0) | {"procs": 0})
+            for metric in METRICS:
+                totals[metric] += values[metric]
+            totals["procs"] += 1
+        self._processes = {pid: p for pid, p in self._processes.items() if pid in seen}
+        return {"time": time.time(), "groups": groups}
+
+def _summarize(samples):
+    """Peak and average of each metric per group over some samples"""
+    per_group = {}
+    for sample in samples:
+        for group, values in sample["groups"].items():
+            per_group.setdefault(group, []).append(values)
+    summary = {}
+    for group, values in per_group.items():
+        summary[group] = {"samples": len(values)}
+        for metric in METRICS:
+            series = [v[metric] for v in values]
+            summary[group][f"{metric}_peak"] = round(max(series), 1)
+            summary[group][f"{metric}_avg"] = round(sum(series) / len(series), 1)
+    return summary
+
+def stage_resource_stats(samples, timeline, start_time):
+    """
+    Per-stage summaries from a Pipeline timeline (offsets relative to
+    `start_time`). Stages overlap, so a sample counts for every stage running
+    at that moment. Adds a "run" entry covering all samples.
+    """
+    stats = {}
+    for entry in timeline.values():
+        if entry["start"] is None or entry["end"] is None:
+            continue
+        window = [s for s in samples if start_time + entry["start"] <= s["time"] <= start_time + entry["end"]]
+        if window:
+            stats[entry["label"]] = _summarize(window)
+    stats["run"] = _summarize(samples)
+    return stats
+
+def load_resource_history():
+    """Past runs, oldest first"""
+    try:
+        lines = RESOURCE_HISTORY_FILE.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    history = []
+    for line in lines:
+        try:
+            history.append(json.loads(line))
+        except ValueError:
+            continue  # A line cut short by a crash
+    return history
+
+def record_resource_history(stats, label, duration, kept=RESOURCE_HISTORY_KEPT):
+    """Append this run to the JSONL history, trimming it to the last `kept` runs"""
+    entry = {"time": datetime.now().isoformat(timespec="seconds"), "label": str(label),
+             "duration": round(duration, 1), "stages": stats}
+    RESOURCE_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESOURCE_HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    history = load_resource_history()
+    if len(history) > kept:
+        tmp_file = RESOURCE_HISTORY_FILE.with_suffix(".tmp")
+        tmp_file.write_text("".join(json.dumps(e) + "\n" for e in history[-kept:]), encoding="utf-8")
+        tmp_file.replace(RESOURCE_HISTORY_FILE)
+    return entry
+
+def find_regressions(current, history, baseline_runs=RESOURCE_BASELINE_RUNS, factor=RESOURCE_REGRESSION_FACTOR):
+    """
+    Compare a run's peak RSS, peak threads/fds and average CPU per group with
+    the median of the previous `baseline_runs` runs. Returns message lines.
+    """
+    baseline = [e["stages"].get("run", {}) for e in history[-baseline_runs:]]
+    messages = []
+    for group, values in current.get("run", {}).items():
+        for metric in ("rss_peak", "cpu_avg", "threads_peak", "fds_peak"):
+            past = [run[group][metric] for run in baseline if group in run]
+            if len(past) < 3:
+                continue  # Too little history for a baseline
+            median = statistics.median(past)
+            if median > 0 and values[metric] >= median * factor:
+                messages.append(f"{group} {_metric_name(metric)} {_format_value(metric, values[metric])} vs "
+                                f"median {_format_value(metric, median)} of the last {len(past)} runs")
+        rss_peaks = [run[group]["rss_peak"] for run in baseline if group in run] + [values["rss_peak"]]
+        if len(rss_peaks) >= 5 and all(a < b for a, b in zip(rss_peaks[-5:], rss_peaks[-4:])):
+            messages.append(f"{group} peak RSS rose in each of the last 5 runs "
+                            f"({_format_value('rss_peak', rss_peaks[-5])} → {_format_value('rss_peak', rss_peaks[-1])}); possible leak")
+    return messages
+
+def _metric_name(metric):
+    name, kind = metric.rsplit("_", 1)
+    return f"{'average' if kind == 'avg' else 'peak'} {name.upper() if name in ('cpu', 'rss') else name}"
+
+def _format_value(metric, value):
+    if metric.startswith("rss"):
+        return f"{value / 1024 ** 2:.0f} MB"
+    if metric.startswith("cpu"):
+        return f"{value:.0f}%"
+    return f"{value:.0f}"
+
+def format_resource_report(stats, regressions=()):
+    """Markdown table with peak/average per stage and process group"""
+    if not stats.get("run"):
+        return "No resource samples were taken (no app, Robot or browser process was found).\n"
+    md = "| Stage | Process | CPU avg / peak | RSS avg / peak | Threads peak | FDs peak |\n|---|---|---|---|---|---|\n"
+    for stage, groups in stats.items():
+        for group, v in sorted(groups.items()):
+            md += (f"| {'**whole run**' if stage == 'run' else stage} | {group} | {v['cpu_avg']:.0f}% / {v['cpu_peak']:.0f}% | "
+                   f"{v['rss_avg'] / 1024 ** 2:.0f} / {v['rss_peak'] / 1024 ** 2:.0f} MB | "
+                   f"{v['threads_peak']:.0f} | {v['fds_peak']:.0f} |\n")
+    for message in regressions:
+        md += f"\n* ⚠️ {message}"
+    md += f"\n\nHistory: `{RESOURCE_HISTORY_FILE}`\n"
+    return md
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import platform
+import shutil
+import time
+from importlib import metadata
+from pathlib import Path
+from config import PROJECT_ROOT, AUTODEV_STATE_DIR, relative_robot_path_str, TEST_CACHE_MAX_ENTRIES
+
+TEST_CACHE_DIR = AUTODEV_STATE_DIR / "test_cache"
+CACHED_ARTIFACTS = ["output.xml", "log.html", "report.html", "keyword_profile.json", "keyword_profile.md"]
+
+# Inputs that decide a test outcome besides the tests themselves
+APP_BUILD_INPUTS = ["pom.xml", "src/main"]
+ROBOT_INPUT_SUFFIXES = {".robot", ".resource", ".py", ".yaml", ".yml"}
+TEST_LIBRARIES = [
+    "robotframework",
+    "robotframework-seleniumlibrary",
+    "robotframework-requests",
+    "robotframework-faker",
+    "selenium",
+    "webdriver-manager",
+    "requests",
+    "Faker",
+]
+# Robot variables that change how a run is wired up but not its outcome
+UNCACHED_VARIABLES = {"USE_BROWSER_POOL", "BROWSER_POOL_REGISTRY", "BASE_URL", "FRONTEND_URL"}
+
+def _hash_file(digest, path, root):
+    """Feed a file's relative path and content into a digest"""
+    digest.update(path.relative_to(root).as_posix().encode("utf-8") + b"\0")
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(b"\0")
+
+def _iter_files(path, suffixes=None):
+    """Files under a file or directory in a stable order"""
+    if path.is_file():
+        yield path
+    elif path.is_dir():
+        for file in sorted(p for p in path.rglob("*") if p.is_file()):
+            if suffixes is None or file.suffix.lower() in suffixes:
+                yield file
+
+def library_versions():
+    """Installed versions of the Python test libraries"""
+    versions = {"python": platform.python_version()}
+    for name in TEST_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = "missing"
+    return versions
+
+def compute_cache_key(test_path, test_names=None, project_root=PROJECT_ROOT, variables=None):
+    """
+    Content hash of everything a Robot run depends on: the app build inputs,
+    the Robot suites and their Python helpers (webdriver_setup.py etc.), the
+    test library versions, the selected tests and the Robot variables that
+    affect the outcome (e.g. BROWSER_PROFILE).
+    """
+    digest = hashlib.sha256()
+    digest.update(b"app\0")
+    for entry in APP_BUILD_INPUTS:
+        for file in _iter_files(project_root / entry):
+            _hash_file(digest, file, project_root)
+
+    digest.update(b"robot\0")
+    robot_dirs = {Path(test_path).resolve(), (project_root / relative_robot_path_str).resolve()}
+    for robot_dir in sorted(robot_dirs):
+        for file in _iter_files(robot_dir, ROBOT_INPUT_SUFFIXES):
+            _hash_file(digest, file, project_root.resolve())
+
+    digest.update(json.dumps(library_versions(), sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(sorted(test_names) if test_names is not None else None).encode("utf-8"))
+    outcome_variables = {k: str(v) for k, v in (variables or {}).items() if k not in UNCACHED_VARIABLES}
+    digest.update(json.dumps(outcome_variables, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def load_cached_run(cache_key):
+    """
+    Cached passing run for a key, or None. A hit touches the entry, so
+    prune_cache drops the least recently used entries.
+    """
+    entry_dir = TEST_CACHE_DIR / cache_key
+    try:
+        record = json.loads((entry_dir / "result.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if not record.get("success"):
+        return None  # Written before failures stopped being cached; run again
+    try:
+        os.utime(entry_dir)
+    except OSError:
+        pass  # Pruned meanwhile; the record read above is still good
+    record["output_dir"] = str(entry_dir)
+    return record
+
+def store_cached_run(cache_key, success, results, output_dir, console_tail=""):
+    """
+    Save the results and report files of a passing run under its cache key.
+    Failures are not cached: a flaky one would otherwise be replayed as the
+    final result until an input changes.
+    """
+    if not success or not results:
+        return  # Failed, or nothing ran (e.g. robot missing)
+    entry_dir = TEST_CACHE_DIR / cache_key
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    for name in CACHED_ARTIFACTS:
+        source = Path(output_dir) / name
+        if source.exists():
+            shutil.copy2(source, entry_dir / name)
+    record = {"success": success, "results": results, "created": time.time(), "output": console_tail}
+    (entry_dir / "result.json").write_text(json.dumps(record), encoding="utf-8")
+    prune_cache()
+
+def prune_cache(max_entries=TEST_CACHE_MAX_ENTRIES):
+    """Drop the least recently stored or used cache entries beyond `max_entries`"""
+    if not TEST_CACHE_DIR.is_dir():
+        return
+    entries = sorted((d for d in TEST_CACHE_DIR.iterdir() if d.is_dir()),
+                     key=lambda d: d.stat().st_mtime, reverse=True)
+    for stale in entries[max_entries:]:
+        shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,288 @@
+import json
+import re
+import time
+from pathlib import Path
+from config import (PROJECT_ROOT, JAVA_SRC_DIRS, STATIC_SRC_DIR, relative_robot_path_str,
+                    AUTODEV_STATE_DIR, FULL_SUITE_INTERVAL_HOURS)
+
+COVERAGE_FILE = AUTODEV_STATE_DIR / "test_coverage.json"  # Optional {test name: [relative paths]}
+LAST_FULL_RUN_FILE = AUTODEV_STATE_DIR / "last_full_run.json"
+
+# Files that can change app behaviour but are not traced to individual tests
+APP_ROOTS = ['src/main/', 'pom.xml']
+ROBOT_SOURCE_SUFFIXES = {'.robot', '.resource', '.py', '.yaml', '.yml'}
+BROWSER_NAVIGATION_KEYWORDS = {'openbrowser', 'goto'}
+
+VARIABLE_RE = re.compile(r'[$@&%]\{([^}]+)\}')
+ENDPOINT_RE = re.compile(r'(/api(?:/[\w{}.-]+)*)')
+URL_RE = re.compile(r'https?://[^/\s\'"]+(/[^\s\'"?#]*)?')
+ID_LOCATOR_RE = re.compile(r'^id[:=](.+)$', re.IGNORECASE)
+CSS_ID_RE = re.compile(r'#([A-Za-z][\w-]*)')
+CSS_CLASS_RE = re.compile(r'\.([A-Za-z][\w-]*)')
+XPATH_ID_RE = re.compile(r'@id\s*=\s*[\'"]([^\'"]+)[\'"]')
+JS_ID_RE = re.compile(r'getElementById\(\s*[\'"]([^\'"]+)[\'"]\s*\)')
+
+def _normalize(name):
+    """Robot-style name normalization: case, space and underscore insensitive"""
+    return re.sub(r'[\s_]', '', name).lower()
+
+def _relative(path, project_root=PROJECT_ROOT):
+    """Project-relative POSIX path string"""
+    return Path(path).resolve().relative_to(project_root.resolve()).as_posix()
+
+# --- Source index: what each project file defines or serves ---
+
+def build_source_index(project_root=PROJECT_ROOT):
+    """Index static ids/classes, page assets, JS endpoints and Java endpoint handlers"""
+    index = {"ids": {}, "classes": {}, "pages": {}, "assets": {}, "js_endpoints": {}, "endpoints": {}, "java_deps": {}}
+    static_dir = project_root / STATIC_SRC_DIR
+
+    if static_dir.is_dir():
+        for file in static_dir.rglob('*'):
+            if not file.is_file() or file.suffix.lower() not in ('.html', '.css', '.js'):
+                continue
+            rel = _relative(file, project_root)
+            text = file.read_text(encoding='utf-8', errors='replace')
+            ids = set(re.findall(r'\bid\s*=\s*["\']([^"\']+)["\']', text)) | set(JS_ID_RE.findall(text))
+            classes = {c for attr in re.findall(r'\bclass\s*=\s*["\']([^"\']+)["\']', text) for c in attr.split()}
+            if file.suffix.lower() == '.css':
+                ids |= set(CSS_ID_RE.findall(text))
+                classes |= set(CSS_CLASS_RE.findall(text))
+            for element_id in ids:
+                index["ids"].setdefault(element_id, set()).add(rel)
+            for css_class in classes:
+                index["classes"].setdefault(css_class, set()).add(rel)
+
+            if file.suffix.lower() == '.html':
+                url_path = '/' + file.relative_to(static_dir).as_posix()
+                index["pages"][url_path] = rel
+                if file.name == 'index.html':
+                    index["pages"][url_path[:-len('index.html')]] = rel
+                assets = set()
+                for ref in re.findall(r'(?:href|src)\s*=\s*["\']([^"\'#?]+)["\']', text):
+                    if '://' not in ref and not ref.startswith('//'):
+                        asset = (file.parent / ref).resolve()
+                        if asset.is_file() and asset.is_relative_to(project_root.resolve()):
+                            assets.add(_relative(asset, project_root))
+                index["assets"][rel] = assets
+            elif file.suffix.lower() == '.js':
+                index["js_endpoints"][rel] = set(ENDPOINT_RE.findall(text))
+
+    java_dir = project_root / JAVA_SRC_DIRS[0]
+    if java_dir.is_dir():
+        classes_by_name = {}
+        for file in java_dir.rglob('*.java'):
+            rel = _relative(file, project_root)
+            text = file.read_text(encoding='utf-8', errors='replace')
+            package = re.search(r'^\s*package\s+([\w.]+)\s*;', text, re.MULTILINE)
+            classes_by_name[f"{package.group(1)}.{file.stem}" if package else file.stem] = rel
+            mapping = re.search(r'@RequestMapping\(\s*(?:value\s*=\s*|path\s*=\s*)?"([^"]+)"', text)
+            if mapping:
+                index["endpoints"][mapping.group(1).rstrip('/')] = rel
+            index["java_deps"][rel] = set(re.findall(r'^\s*import\s+([\w.]+)\s*;', text, re.MULTILINE))
+        for rel, imports in index["java_deps"].items():
+            index["java_deps"][rel] = {classes_by_name[i] for i in imports if i in classes_by_name}
+    return index
+
+def _java_closure(rel, java_deps):
+    """A Java file plus the project classes it imports, transitively"""
+    seen, stack = set(), [rel]
+    while stack:
+        current = stack.pop()
+        if current not in seen:
+            seen.add(current)
+            stack.extend(java_deps.get(current, ()))
+    return seen
+
+def _endpoint_files(endpoint, index):
+    """Java files serving an API path"""
+    for mapping, rel in index["endpoints"].items():
+        if endpoint == mapping or endpoint.startswith(mapping + '/'):
+            return _java_closure(rel, index["java_deps"])
+    return set()
+
+# --- Robot model walking ---
+
+def _iter_calls(body):
+    """Yield every keyword call in a Robot body, descending into FOR/IF/TRY blocks"""
+    for item in body or ():
+        if hasattr(item, 'args') and getattr(item, 'name', None):
+            yield item
+        yield from _iter_calls(getattr(item, 'body', None))
+
+def _expand(value, variables, depth=0):
+    """Substitute known suite variables into a string"""
+    if depth > 10:
+        return value
+    def replace(match):
+        known = variables.get(_normalize(match.group(1)))
+        return _expand(known, variables, depth + 1) if known is not None else match.group(0)
+    return VARIABLE_RE.sub(replace, value)
+
+def _collect_calls(body, keywords, seen=None):
+    """Keyword calls reachable from a body, following user keywords"""
+    seen = set() if seen is None else seen
+    calls = []
+    for call in _iter_calls(body):
+        calls.append(call)
+        user_keyword = keywords.get(_normalize(call.name))
+        if user_keyword is not None and _normalize(call.name) not in seen:
+            seen.add(_normalize(call.name))
+            calls.extend(_collect_calls(user_keyword.body, keywords, seen))
+    return calls
+
+def _call_dependencies(call, variables, index):
+    """(relative path, reason) pairs that a single keyword call depends on"""
+    deps = set()
+    args = [_expand(str(arg), variables) for arg in call.args]
+    is_navigation = _normalize(call.name.split('.')[-1]) in BROWSER_NAVIGATION_KEYWORDS
+
+    for locator in args:
+        ids, classes = set(), set()
+        id_match = ID_LOCATOR_RE.match(locator)
+        if id_match:
+            ids.add(id_match.group(1).strip())
+        elif locator.lower().startswith('css:') or locator.lower().startswith('css='):
+            ids |= set(CSS_ID_RE.findall(locator[4:]))
+            classes |= set(CSS_CLASS_RE.findall(locator[4:]))
+        else:
+            ids |= set(XPATH_ID_RE.findall(locator)) | set(JS_ID_RE.findall(locator))
+        for element_id in ids:
+            for rel in index["ids"].get(element_id, ()):
+                deps.add((rel, f"locator id:{element_id}"))
+        for css_class in classes:
+            for rel in index["classes"].get(css_class, ()):
+                deps.add((rel, f"locator .{css_class}"))
+
+        for endpoint in ENDPOINT_RE.findall(locator):
+            for rel in _endpoint_files(endpoint.rstrip('/'), index):
+                deps.add((rel, f"endpoint {endpoint}"))
+
+        url = URL_RE.search(locator)
+        if is_navigation and url:
+            page = index["pages"].get(url.group(1) or '/')
+            if page:
+                deps.add((page, f"page {url.group(1) or '/'}"))
+                for asset in index["assets"].get(page, ()):
+                    deps.add((asset, f"asset of page {url.group(1) or '/'}"))
+                    for endpoint in index["js_endpoints"].get(asset, ()):
+                        for rel in _endpoint_files(endpoint.rstrip('/'), index):
+                            deps.add((rel, f"endpoint {endpoint} called by {Path(asset).name}"))
+    return deps
+
+def build_impact_map(test_path, project_root=PROJECT_ROOT):
+    """
+    Map each Robot test (by full name) to {relative path: [reasons]} for every
+    project file it depends on, via locators, endpoints, page URLs and any
+    recorded per-test coverage.
+    """
+    try:
+        from robot.api import TestSuiteBuilder
+    except ImportError:
+        return {}
+
+    index = build_source_index(project_root)
+    try:
+        coverage = json.loads(COVERAGE_FILE.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        coverage = {}
+
+    impact = {}
+    def visit(suite, inherited_calls):
+        keywords = {_normalize(kw.name): kw for kw in suite.resource.keywords}
+        variables = {_normalize(var.name[2:-1]): ' '.join(str(v) for v in var.value) for var in suite.resource.variables}
+        suite_calls = list(inherited_calls)
+        for fixture in (suite.setup, suite.teardown):
+            if fixture and fixture.name:
+                suite_calls += [(call, 'suite setup/teardown') for call in _collect_calls([fixture], keywords)]
+
+        for test in suite.tests:
+            deps = {}
+            if suite.source and Path(suite.source).resolve().is_relative_to(project_root.resolve()):
+                deps.setdefault(_relative(suite.source, project_root), set()).add("test source")
+            calls = [(call, None) for call in _collect_calls(list(test.body) + [test.setup, test.teardown], keywords)]
+            for call, via in calls + suite_calls:
+                for rel, reason in _call_dependencies(call, variables, index):
+                    deps.setdefault(rel, set()).add(f"{reason} (via {via})" if via else reason)
+            for rel in coverage.get(test.longname, []):
+                deps.setdefault(rel, set()).add("coverage recording")
+            impact[test.longname] = {rel: sorted(reasons) for rel, reasons in deps.items()}
+
+        for child in suite.suites:
+            visit(child, suite_calls)
+
+    try:
+        visit(TestSuiteBuilder().build(str(test_path)), [])
+    except Exception:
+        return {}
+    return impact
+
+# --- Selection ---
+
+def _is_app_file(rel):
+    return any(rel == root or rel.startswith(root) for root in APP_ROOTS)
+
+def _is_test_support_file(rel):
+    return rel.startswith(relative_robot_path_str + '/') and Path(rel).suffix.lower() in ROBOT_SOURCE_SUFFIXES
+
+def select_affected_tests(changed_paths, impact_map):
+    """
+    Pick the tests affected by `changed_paths`.
+    Returns (selected {test: [reasons]}, full_suite_reason or None).
+    """
+    selected = {}
+    for rel in changed_paths:
+        matched = False
+        for test, deps in impact_map.items():
+            if rel in deps:
+                selected.setdefault(test, []).extend(f"`{rel}`: {reason}" for reason in deps[rel])
+                matched = True
+        if matched:
+            continue
+        if _is_test_support_file(rel):
+            return selected, f"test support file `{rel}` changed"
+        if _is_app_file(rel):  # Static files too: a JS/CSS file the locator scan missed still affects pages
+            return selected, f"`{rel}` is not traced to individual tests"
+    return selected, None
+
+def full_suite_due():
+    """True when the scheduled full run is overdue"""
+    try:
+        last = json.loads(LAST_FULL_RUN_FILE.read_text(encoding='utf-8'))["timestamp"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return True
+    return time.time() - last > FULL_SUITE_INTERVAL_HOURS * 3600
+
+def record_full_run():
+    """Remember when the full suite last ran"""
+    LAST_FULL_RUN_FILE.parent.mkdir(parents=True, exist_ok=True)
+    LAST_FULL_RUN_FILE.write_text(json.dumps({"timestamp": time.time()}), encoding='utf-8')
+
+def plan_test_selection(test_path, changed_paths, force_full=False, project_root=PROJECT_ROOT):
+    """
+    Decide what to run: {"mode": "full" | "subset" | "none", "reason": str,
+    "tests": {test: [reasons]}}.
+    """
+    if force_full:
+        return {"mode": "full", "reason": "full suite requested", "tests": {}}
+    if full_suite_due():
+        return {"mode": "full", "reason": f"scheduled full run (every {FULL_SUITE_INTERVAL_HOURS}h)", "tests": {}}
+
+    impact_map = build_impact_map(test_path, project_root)
+    if not impact_map:
+        return {"mode": "full", "reason": "test impact map unavailable", "tests": {}}
+
+    selected, full_reason = select_affected_tests(changed_paths, impact_map)
+    if full_reason:
+        return {"mode": "full", "reason": full_reason, "tests": {}}
+    if not selected:
+        return {"mode": "none", "reason": "no changes affect any Robot test", "tests": {}}
+    return {"mode": "subset", "reason": f"{len(selected)} of {len(impact_map)} tests affected", "tests": selected}
+
+def format_selection_report(selection):
+    """Markdown summary of the selected tests and why each was picked"""
+    report = f"* 🎯 Test selection: **{selection['mode']}** ({selection['reason']})\n"
+    for test, reasons in selection["tests"].items():
+        report += f"    * `{test}` ← {'; '.join(reasons[:3])}"
+        report += f" (+{len(reasons) - 3} more)\n" if len(reasons) > 3 else "\n"
+    return report
@@ -0,0 +1,219 @@
+"""
+Robot Framework listener that profiles keyword time and deliberate waiting.
+
+    robot --listener robot_profiler.py tests/
+
+Records total and self time per keyword, adds up time spent in `Sleep` and
+the estimated Selenium speed delay, flags sleeps that could be explicit
+waits and writes keyword_profile.json / keyword_profile.md next to output.xml.
+Only the standard library is used here so Robot can load it from any cwd.
+"""
+import json
+import re
+import time
+from pathlib import Path
+
+PROFILE_JSON = "keyword_profile.json"
+PROFILE_MARKDOWN = "keyword_profile.md"
+HOT_SPOT_LIMIT = 15  # Keywords listed in the markdown report
+
+KEYWORD_TYPES = {"KEYWORD", "SETUP", "TEARDOWN"}  # Other types are control structures (FOR, IF, ...)
+SLEEP_KEYWORDS = {"builtin.sleep"}
+SPEED_KEYWORDS = {"seleniumlibrary.set selenium speed"}
+WAIT_PREFIXES = ("wait until", "wait for")
+LOCATOR_PATTERN = re.compile(r"^(id|name|css|xpath|link|partial link|class|tag|dom|jquery|sizzle)[:=]|^//|^\$\{", re.I)
+
+def _seconds(value):
+    """Robot time string ('1s', '0.2 seconds', '200ms') in seconds; 0 when unparseable"""
+    try:
+        from robot.utils import timestr_to_secs
+        return timestr_to_secs(value)
+    except Exception:
+        return 0.0
+
+def _full_name(name, attrs):
+    return f"{attrs['libname']}.{attrs['kwname']}" if attrs.get("libname") else name
+
+class _Frame:
+    __slots__ = ("name", "attrs", "start", "child_time", "previous")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.perf_counter()
+        self.child_time = 0.0
+        self.previous = None  # (full name, attrs) of the last keyword finished directly inside this one
+
+class robot_profiler:
+    """Listener API v2; Robot instantiates the class named like the module"""
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, output_dir=None):
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.stack = [_Frame("<root>", {})]  # Tests push their own frame so top-level sleeps are seen
+        self.keywords = {}  # full name -> {"calls", "total", "self"}
+        self.sleep_time = 0.0
+        self.sleeps = []
+        self.speed = 0.0
+        self.speed_calls = 0
+        self.speed_delay = 0.0
+        self.suite_start = None
+        self.wall_time = 0.0
+
+    def start_suite(self, name, attrs):
+        if self.suite_start is None:
+            self.suite_start = time.perf_counter()
+
+    def end_suite(self, name, attrs):
+        if self.suite_start is not None:
+            self.wall_time = time.perf_counter() - self.suite_start
+
+    def start_test(self, name, attrs):
+        self.stack.append(_Frame("<test>", {}))
+
+    def end_test(self, name, attrs):
+        self._flag_trailing_sleep(self.stack.pop())
+
+    def start_keyword(self, name, attrs):
+        if attrs.get("type", "KEYWORD").upper() not in KEYWORD_TYPES:
+            return
+        full_name = _full_name(name, attrs)
+        parent = self.stack[-1]
+        if parent.previous and parent.previous[0].lower() in SLEEP_KEYWORDS:
+            self._flag_sleep(parent.previous[1], next_name=full_name, next_args=attrs.get("args", []))
+            parent.previous = None
+        self.stack.append(_Frame(full_name, attrs))
+
+    def end_keyword(self, name, attrs):
+        if attrs.get("type", "KEYWORD").upper() not in KEYWORD_TYPES or len(self.stack) < 2:
+            return
+        frame = self.stack.pop()
+        elapsed = time.perf_counter() - frame.start
+        stats = self.keywords.setdefault(frame.name, {"calls": 0, "total": 0.0, "self": 0.0})
+        stats["calls"] += 1
+        stats["total"] += elapsed
+        stats["self"] += elapsed - frame.child_time
+
+        lowered = frame.name.lower()
+        self._flag_trailing_sleep(frame)
+        if lowered in SLEEP_KEYWORDS:
+            self.sleep_time += elapsed
+            frame.attrs["elapsed"] = elapsed
+            frame.attrs["previous"] = self.stack[-1].previous[0] if self.stack[-1].previous else None
+        elif lowered in SPEED_KEYWORDS and frame.attrs.get("args"):
+            self.speed = _seconds(frame.attrs["args"][0])
+        elif attrs.get("libname") == "SeleniumLibrary" and self.speed:
+            # SeleniumLibrary sleeps `speed` after every WebDriver command; count one per keyword
+            self.speed_calls += 1
+            self.speed_delay += self.speed
+
+        self.stack[-1].child_time += elapsed
+        self.stack[-1].previous = (frame.name, frame.attrs)
+
+    def _flag_trailing_sleep(self, frame):
+        """Record a Sleep that was the last step of a keyword or test"""
+        if frame.previous and frame.previous[0].lower() in SLEEP_KEYWORDS:
+            self._flag_sleep(frame.previous[1])
+            frame.previous = None
+
+    def _flag_sleep(self, sleep_attrs, next_name=None, next_args=()):
+        """Record a finished Sleep with a suggestion when an explicit wait could replace it"""
+        previous = sleep_attrs.get("previous") or ""
+        first_arg = next_args[0] if next_args else ""
+        suggestion = None
+        if previous.lower().split(".")[-1].startswith(WAIT_PREFIXES):
+            suggestion = f"Follows `{previous.split('.')[-1]}`; the explicit wait already synchronises, drop the sleep"
+        elif next_name and next_name.lower().split(".")[-1].startswith(WAIT_PREFIXES):
+            suggestion = f"Followed by `{next_name.split('.')[-1]}`; drop the sleep or raise that wait's timeout"
+        elif next_name and next_name.startswith("SeleniumLibrary.") and LOCATOR_PATTERN.search(str(first_arg)):
+            suggestion = f"Replace with `Wait Until Element Is Visible    {first_arg}` before `{next_name.split('.')[-1]}`"
+        self.sleeps.append({
+            "duration": round(sleep_attrs.get("elapsed", 0.0), 3),
+            "args": list(sleep_attrs.get("args", [])),
+            "source": sleep_attrs.get("source"),
+            "lineno": sleep_attrs.get("lineno"),
+            "suggestion": suggestion,
+        })
+
+    def output_file(self, path):
+        if self.output_dir is None:
+            self.output_dir = Path(path).parent
+
+    def close(self):
+        self._flag_trailing_sleep(self.stack[0])  # A Sleep used directly as suite setup/teardown
+        profile = build_profile(self)
+        write_profile(profile, self.output_dir or Path.cwd())
+
+def build_profile(listener):
+    """Serializable profile of a finished run"""
+    keywords = [{"name": name, "calls": s["calls"], "total": round(s["total"], 3), "self": round(s["self"], 3)}
+                for name, s in listener.keywords.items()]
+    keywords.sort(key=lambda k: k["self"], reverse=True)
+    return {
+        "wall_time": round(listener.wall_time, 3),
+        "sleep_time": round(listener.sleep_time, 3),
+        "speed_delay": round(listener.speed_delay, 3),
+        "speed_calls": listener.speed_calls,
+        "keywords": keywords,
+        "sleeps": listener.sleeps,
+    }
+
+def merge_profiles(profile_paths):
+    """Combine the profiles of parallel shards; times (wall time included) are summed over shards"""
+    merged = {"wall_time": 0.0, "sleep_time": 0.0, "speed_delay": 0.0, "speed_calls": 0, "keywords": [], "sleeps": []}
+    keywords = {}
+    for path in profile_paths:
+        try:
+            profile = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            continue
+        for key in ("wall_time", "sleep_time", "speed_delay", "speed_calls"):
+            merged[key] += profile[key]
+        merged["sleeps"] += profile["sleeps"]
+        for kw in profile["keywords"]:
+            stats = keywords.setdefault(kw["name"], {"name": kw["name"], "calls": 0, "total": 0.0, "self": 0.0})
+            stats["calls"] += kw["calls"]
+            stats["total"] += kw["total"]
+            stats["self"] += kw["self"]
+    merged["keywords"] = sorted(keywords.values(), key=lambda k: k["self"], reverse=True)
+    return merged
+
+def write_profile(profile, output_dir):
+    """Write a (merged) profile as JSON and markdown into `output_dir`"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / PROFILE_JSON).write_text(json.dumps(profile, indent=2), encoding="utf-8")
+    (output_dir / PROFILE_MARKDOWN).write_text(format_profile_markdown(profile), encoding="utf-8")
+
+def load_profile(output_dir):
+    """Profile written next to an output.xml, or None"""
+    try:
+        return json.loads((Path(output_dir) / PROFILE_JSON).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+def format_profile_summary(profile):
+    """One-line summary of deliberate waiting for the chat"""
+    waiting = profile["sleep_time"] + profile["speed_delay"]
+    share = f" ({waiting / profile['wall_time']:.0%} of {profile['wall_time']:.1f}s)" if profile["wall_time"] else ""
+    replaceable = [s for s in profile["sleeps"] if s["suggestion"]]
+    return (f"* ⏳ Deliberate waiting: {waiting:.1f}s{share} — Sleep {profile['sleep_time']:.1f}s, "
+            f"Selenium speed ~{profile['speed_delay']:.1f}s; {len(replaceable)} of {len(profile['sleeps'])} "
+            f"sleeps could be explicit waits")
+
+def format_profile_markdown(profile, limit=HOT_SPOT_LIMIT):
+    """Ranked hot-spot report"""
+    md = "# Keyword profile\n\n" + format_profile_summary(profile) + "\n\n"
+    md += "## Hot spots (by self time)\n\n| # | Keyword | Calls | Self | Total |\n|---|---|---|---|---|\n"
+    for rank, kw in enumerate(profile["keywords"][:limit], 1):
+        md += f"| {rank} | {kw['name']} | {kw['calls']} | {kw['self']:.2f}s | {kw['total']:.2f}s |\n"
+
+    replaceable = sorted((s for s in profile["sleeps"] if s["suggestion"]), key=lambda s: s["duration"], reverse=True)
+    if replaceable:
+        md += "\n## Sleeps that could be explicit waits\n\n| Where | Sleep | Suggestion |\n|---|---|---|\n"
+        for sleep in replaceable:
+            where = f"{Path(sleep['source']).name}:{sleep['lineno']}" if sleep["source"] else "-"
+            md += f"| {where} | {' '.join(sleep['args'])} ({sleep['duration']:.1f}s) | {sleep['suggestion']} |\n"
+    md += ("\nSelenium speed delay is estimated as one WebDriver command per SeleniumLibrary keyword "
+           f"({profile['speed_calls']} calls), so the real delay is at least this much.\n")
+    return md
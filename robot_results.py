@@ -0,0 +1,138 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+
+MAX_FAILURE_MESSAGE = 500  # Characters of a failure message kept per test
+
+def _parse_robot_time(value):
+    """Parse a Robot Framework 6 timestamp like '20250410 11:45:46.735'"""
+    return datetime.strptime(value, "%Y%m%d %H:%M:%S.%f")
+
+def _status_elapsed(status):
+    """Elapsed seconds recorded on a Robot <status> element"""
+    if status is None:
+        return None
+    if status.get("elapsed") is not None:  # Robot Framework 7 schema
+        return float(status.get("elapsed"))
+    start, end = status.get("starttime"), status.get("endtime")
+    if not start or not end or "N/A" in (start, end):
+        return None
+    return (_parse_robot_time(end) - _parse_robot_time(start)).total_seconds()
+
+def read_test_results(output_xml):
+    """
+    Stream a Robot output.xml into compact per-test records:
+    {"name", "status", "duration", "message"}. Keyword and message elements
+    are discarded as soon as their test ends, so memory grows with the number
+    of tests rather than the size of the log.
+    """
+    results = []
+    suite_names = []
+    test_depth = 0
+    for event, elem in ET.iterparse(str(output_xml), events=("start", "end")):
+        if event == "start":
+            if elem.tag == "suite":
+                suite_names.append(elem.get("name", ""))
+            elif elem.tag == "test":
+                test_depth += 1
+            continue
+
+        if elem.tag == "test":
+            test_depth -= 1
+            status = elem.find("status")
+            message = (status.text or "").strip() if status is not None else ""
+            if len(message) > MAX_FAILURE_MESSAGE:
+                message = message[:MAX_FAILURE_MESSAGE] + "..."
+            results.append({
+                "name": ".".join(suite_names + [elem.get("name", "")]),
+                "status": status.get("status", "NOT RUN") if status is not None else "NOT RUN",
+                "duration": _status_elapsed(status),
+                "message": message,
+            })
+            elem.clear()
+        elif elem.tag == "suite":
+            suite_names.pop()
+            elem.clear()
+        elif elem.tag in ("kw", "msg") and not test_depth:
+            elem.clear()  # Suite setup/teardown details are not needed
+    return results
+
+def merge_rerun_results(attempts):
+    """
+    Fold the results of a run and its failed-only reruns (oldest first) into
+    one record per test, taken from its latest attempt, with "attempts" and an
+    "outcome": passed, flaky (failed, then passed on a rerun), failed (failed
+    every attempt) or skipped.
+    """
+    history = {}
+    for results in attempts:
+        for result in results:
+            history.setdefault(result["name"], []).append(result)
+
+    merged = []
+    for name, runs in history.items():
+        record = dict(runs[-1])
+        statuses = [run["status"] for run in runs]
+        if statuses[0] == "PASS":
+            outcome = "passed"
+        elif statuses[-1] == "PASS":
+            outcome = "flaky"
+        elif "FAIL" in statuses:
+            outcome = "failed"
+        else:
+            outcome = "skipped"
+        record.update(attempts=len(runs), outcome=outcome)
+        merged.append(record)
+    return merged
+
+def format_rerun_report(results, reruns):
+    """Summary line for a run whose failures were retried; empty when nothing was rerun"""
+    if not reruns:
+        return ""
+    flaky = sum(1 for r in results if r.get("outcome") == "flaky")
+    hard = sum(1 for r in results if r.get("outcome") == "failed")
+    return (f"* 🔁 Retried failed tests ({reruns} rerun{'s' if reruns != 1 else ''}): "
+            f"{flaky} flaky, {hard} hard failure{'s' if hard != 1 else ''}. Git and deploy follow the merged result.\n")
+
+def summarize_results(results):
+    """Counts and total duration of a list of test records"""
+    summary = {"total": len(results), "passed": 0, "failed": 0, "skipped": 0, "flaky": 0, "duration": 0.0}
+    for result in results:
+        if result.get("outcome") == "flaky":
+            summary["flaky"] += 1
+        if result["status"] == "PASS":
+            summary["passed"] += 1
+        elif result["status"] == "FAIL":
+            summary["failed"] += 1
+        else:
+            summary["skipped"] += 1
+        summary["duration"] += result["duration"] or 0.0
+    return summary
+
+def format_results_markdown(results, success, output_dir=None, cached=False):
+    """Markdown summary of a test run with a per-test table and links to the full log/report"""
+    summary = summarize_results(results)
+    skipped = f", {summary['skipped']} skipped" if summary["skipped"] else ""
+    skipped += f", {summary['flaky']} flaky" if summary["flaky"] else ""
+    marker = " (♻️ cached)" if cached else ""
+    md = (f"Robot Test Run{marker}: {'Success' if success else 'Failure'} — {summary['total']} tests, "
+          f"{summary['passed']} passed, {summary['failed']} failed{skipped} ({summary['duration']:.1f}s)\n\n")
+    if results:
+        md += "| Test | Status | Time | Message |\n|---|---|---|---|\n"
+        for result in results:
+            icon = {"PASS": "✅", "FAIL": "❌"}.get(result["status"], "⏭️")
+            status = result["status"]
+            if result.get("outcome") == "flaky":
+                icon, status = "⚠️", f"FLAKY (passed on attempt {result['attempts']})"
+            elif result.get("outcome") == "failed" and result["attempts"] > 1:
+                status = f"FAIL (all {result['attempts']} attempts)"
+            duration = f"{result['duration']:.1f}s" if result["duration"] is not None else "-"
+            message = result["message"].replace("|", "\\|").replace("\n", " ")
+            md += f"| {result['name']} | {icon} {status} | {duration} | {message} |\n"
+    if output_dir:
+        output_dir = Path(output_dir)
+        links = [f"[{name}]({(output_dir / name).resolve().as_uri()})"
+                 for name in ("log.html", "report.html", "output.xml", "keyword_profile.md") if (output_dir / name).exists()]
+        if links:
+            md += f"\nFull results: {' · '.join(links)}\n"
+    return md
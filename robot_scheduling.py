@@ -0,0 +1,94 @@
+import heapq
+import json
+import time
+from config import AUTODEV_STATE_DIR, DURATION_DECAY_ALPHA
+
+DURATION_HISTORY_FILE = AUTODEV_STATE_DIR / "test_durations.json"
+DEFAULT_TEST_DURATION = 10.0  # Seconds assumed for a test with no history yet
+
+def discover_robot_tests(test_path):
+    """List the full names of all Robot test cases under a file or directory"""
+    try:
+        from robot.api import TestSuiteBuilder
+    except ImportError:
+        return []
+
+    try:
+        suite = TestSuiteBuilder().build(str(test_path))
+    except Exception:
+        return []
+    return [test.longname for test in suite.all_tests]
+
+def load_duration_history():
+    """Load the per-test duration history from local state"""
+    try:
+        return json.loads(DURATION_HISTORY_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_duration_history(history):
+    """Persist the per-test duration history to local state"""
+    DURATION_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = DURATION_HISTORY_FILE.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(history, indent=2, sort_keys=True), encoding="utf-8")
+    tmp_file.replace(DURATION_HISTORY_FILE)
+
+def update_duration_history(results, alpha=DURATION_DECAY_ALPHA):
+    """Fold the test records of a finished run into the history with exponential decay"""
+    observed = {r["name"]: r["duration"] for r in results if r["duration"] is not None}
+    if not observed:
+        return observed
+
+    history = load_duration_history()
+    now = time.time()
+    for name, elapsed in observed.items():
+        entry = history.get(name)
+        if entry:
+            entry["estimate"] = alpha * elapsed + (1 - alpha) * entry["estimate"]
+            entry["runs"] += 1
+        else:
+            entry = {"estimate": elapsed, "runs": 1}
+        entry["last"] = elapsed
+        entry["updated"] = now
+        history[name] = entry
+    save_duration_history(history)
+    return observed
+
+def estimate_duration(history, test_name):
+    """Predicted duration of a test, falling back to the mean of known tests"""
+    entry = history.get(test_name)
+    if entry:
+        return entry["estimate"]
+    if history:
+        return sum(e["estimate"] for e in history.values()) / len(history)
+    return DEFAULT_TEST_DURATION
+
+def schedule_longest_first(test_names, workers, history):
+    """
+    Assign tests to at most `workers` shards, longest predicted test first onto
+    the least loaded shard. Returns (shards, predicted_loads).
+    """
+    workers = max(1, min(workers, len(test_names)))
+    if not test_names:
+        return [], []
+
+    ordered = sorted(test_names, key=lambda name: estimate_duration(history, name), reverse=True)
+    shards = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    heap = [(0.0, i) for i in range(workers)]
+    for name in ordered:
+        load, i = heapq.heappop(heap)
+        shards[i].append(name)
+        loads[i] = load + estimate_duration(history, name)
+        heapq.heappush(heap, (loads[i], i))
+    return shards, loads
+
+def format_schedule_report(report):
+    """One-line markdown summary of predicted vs actual makespan"""
+    predicted = report["predicted_makespan"]
+    actual = report["actual_makespan"]
+    line = (f"* ⏱️ Test schedule: {report['workers']} worker(s), {report['tests']} test(s), "
+            f"predicted makespan {predicted:.1f}s, actual {actual:.1f}s")
+    if predicted:
+        line += f" ({(actual - predicted) / predicted:+.0%})"
+    return line + "\n"
@@ -0,0 +1,40 @@
+"""
+Rebot pre-modifier that folds combined shard outputs back into one suite.
+
+    rebot --prerebotmodifier robot_shard_combiner.py shard-*/output.xml
+
+Plain rebot puts each shard's top suite under a new combined suite ("A & A &
+..."), so test names would gain an extra level. Every shard ran the same
+suite with a different --test selection; this moves their tests and child
+suites (merging child suites of the same name) up into the combined suite,
+which keeps the names a single-process run produces for the duration history
+and --rerunfailed. Only Robot itself is imported so rebot can load it from any cwd.
+"""
+from robot.api import SuiteVisitor
+
+def _merge_into(target, source):
+    """Move the tests and child suites of `source` into `target`"""
+    for test in list(source.tests):
+        target.tests.append(test)
+    children = {suite.name: suite for suite in target.suites}
+    for suite in list(source.suites):
+        if suite.name in children:
+            _merge_into(children[suite.name], suite)
+        else:
+            children[suite.name] = suite
+            target.suites.append(suite)
+
+class robot_shard_combiner(SuiteVisitor):
+    """Robot instantiates the class named like the module; only the combined top suite is visited"""
+
+    def start_suite(self, suite):
+        shards = list(suite.suites)
+        if not shards or suite.tests:
+            return False
+        first = shards[0]
+        suite.suites = []
+        suite.name, suite.source, suite.doc, suite.metadata = first.name, first.source, first.doc, first.metadata
+        suite.setup, suite.teardown = first.setup, first.teardown
+        for shard in shards:
+            _merge_into(suite, shard)
+        return False
@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from faker import Faker
+from requests.adapters import HTTPAdapter
+from robot.api import logger
+from robot.api.deco import keyword, library
+
+DEFAULT_WORKERS = 16  # Concurrent requests, and keep-alive connections in the pool
+REQUEST_TIMEOUT = 10
+
+@library(scope="SUITE", auto_keywords=False)
+class employee_data:
+    """
+    Bulk test data through /api/employees. One requests.Session with a
+    keep-alive pool of `workers` connections is shared by a thread pool, so
+    seeding and cleanup run concurrently instead of one form submit at a time.
+    Employees created here are remembered and removed by `Cleanup Seeded Employees`.
+    """
+
+    def __init__(self, base_url="http://localhost:8081", workers=DEFAULT_WORKERS, locale=None):
+        self.base_url = base_url.rstrip("/")
+        self.workers = int(workers)
+        self.faker = Faker(locale) if locale else Faker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.seeded_ids = []
+
+    @property
+    def endpoint(self):
+        return f"{self.base_url}/api/employees"
+
+    @keyword
+    def generate_employee_data(self, count=1):
+        """
+        Employee dicts with the same fields and Faker providers as the suite's
+        `Generate Random Employee Data` (first/last name, email, job as
+        department). Emails are unique within the library instance. Returns one
+        dict when `count` is 1, else a list.
+        """
+        employees = [{
+            "firstName": self.faker.first_name(),
+            "lastName": self.faker.last_name(),
+            "email": self.faker.unique.email(),
+            "department": self.faker.job(),
+        } for _ in range(int(count))]
+        return employees[0] if int(count) == 1 else employees
+
+    def _map(self, func, items):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(func, items))
+
+    def _create(self, employee):
+        response = self.session.post(self.endpoint, json=employee, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 201:
+            raise AssertionError(f"Creating {employee.get('email')} failed: {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    def _delete(self, employee_id):
+        response = self.session.delete(f"{self.endpoint}/{employee_id}", timeout=REQUEST_TIMEOUT)
+        if response.status_code not in (204, 404):  # Already gone counts as cleaned up
+            raise AssertionError(f"Deleting employee {employee_id} failed: {response.status_code}")
+        return employee_id
+
+    @keyword
+    def create_employees(self, employees):
+        """Create the given employee dicts concurrently; returns the created records with ids"""
+        start = time.perf_counter()
+        created = self._map(self._create, list(employees))
+        self.seeded_ids.extend(e["id"] for e in created)
+        logger.info(f"Created {len(created)} employees in {time.perf_counter() - start:.2f}s")
+        return created
+
+    @keyword
+    def seed_employees(self, count):
+        """Generate and create `count` employees; returns the created records"""
+        employees = self.generate_employee_data(count)
+        return self.create_employees(employees if isinstance(employees, list) else [employees])
+
+    @keyword
+    def delete_employees(self, employees):
+        """Delete employees given as records or ids, concurrently"""
+        ids = [e["id"] if isinstance(e, dict) else e for e in employees]
+        start = time.perf_counter()
+        deleted = set(self._map(self._delete, ids))
+        self.seeded_ids = [i for i in self.seeded_ids if i not in deleted]
+        logger.info(f"Deleted {len(deleted)} employees in {time.perf_counter() - start:.2f}s")
+
+    @keyword
+    def cleanup_seeded_employees(self):
+        """Delete every employee created through this library"""
+        if self.seeded_ids:
+            self.delete_employees(list(self.seeded_ids))
+
+    @keyword
+    def delete_all_employees(self):
+        """Delete every employee the API returns"""
+        response = self.session.get(self.endpoint, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        self.delete_employees(response.json())
+
+    @keyword
+    def get_employee_count(self):
+        response = self.session.get(self.endpoint, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return len(response.json())
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Seed or clean up employees through the REST API")
+    parser.add_argument("command", choices=["seed", "clear"])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--base-url", default="http://localhost:8081")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+    library_instance = employee_data(args.base_url, args.workers)
+    start_time = time.perf_counter()
+    if args.command == "seed":
+        library_instance.seed_employees(args.count)
+        print(f"Seeded {args.count} employees in {time.perf_counter() - start_time:.2f}s")
+    else:
+        library_instance.delete_all_employees()
+        print(f"Deleted all employees in {time.perf_counter() - start_time:.2f}s")
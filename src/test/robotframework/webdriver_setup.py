@@ -1,10 +1,136 @@
+import json
+import os
+import platform
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import time
+from pathlib import Path
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium import webdriver
+from selenium.webdriver.edge.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+
+__all__ = ['get_browser_version', 'get_webdriver_path', 'get_options', 'apply_browser_profile',
+           'lease_pooled_browser', 'reset_pooled_browser', 'release_pooled_browser']
+
+# Drivers are cached per installed browser version so resolution works offline
+DRIVER_CACHE_DIR = Path(os.environ.get("AUTODEV_DRIVER_CACHE", Path.home() / ".cache" / "autodev" / "drivers"))
+DRIVER_NAME = "msedgedriver.exe" if platform.system() == "Windows" else "msedgedriver"
+OFFLINE = os.environ.get("AUTODEV_OFFLINE", "").lower() in ("1", "true", "yes")
+
+POOL_LOCK_TIMEOUT = 30  # Seconds to wait for the pool registry lock
+POOL_LEASE_WAIT = 10  # Seconds to wait for a free pooled browser before launching a local one
+DEFAULT_WINDOW_SIZE = "1920,1080"
+
+# Browser profiles selectable with the Robot variable ${BROWSER_PROFILE}:
+#   normal   - headed browser, everything enabled (the original behaviour)
+#   headless - headless with the same page behaviour as normal
+#   fast     - headless, images and web fonts blocked, animations and transitions off
+BROWSER_PROFILES = ("normal", "headless", "fast")
+FAST_BLOCKED_URLS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+                     "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*"]
+NO_MOTION_SCRIPT = """
+(function () {
+    const css = '*, *::before, *::after { transition: none !important; animation: none !important; scroll-behavior: auto !important; }';
+    const inject = () => {
+        const style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.documentElement) { inject(); } else { document.addEventListener('DOMContentLoaded', inject); }
+})();
+"""
+
+_resolved_driver_path = None
+_leased = None  # (registry_path, entry_id, driver) held by this Robot process; registry_path is None for a local fallback browser
+
+def get_browser_version():
+    """Version of the locally installed Edge browser, or None if it cannot be found"""
+    system = platform.system()
+    try:
+        if system == "Windows":
+            import winreg
+            for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(hive, r"Software\Microsoft\Edge\BLBeacon") as key:
+                        return winreg.QueryValueEx(key, "version")[0]
+                except OSError:
+                    continue
+            return None
+        if system == "Darwin":
+            commands = [["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge", "--version"]]
+        else:
+            commands = [["microsoft-edge", "--version"], ["microsoft-edge-stable", "--version"]]
+        for command in commands:
+            try:
+                output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+            except (FileNotFoundError, subprocess.TimeoutExpired):
+                continue
+            match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+            if match:
+                return match.group(1)
+    except Exception:
+        pass
+    return None
+
+def _cached_driver(version):
+    """Driver cached for an exact browser version, else the newest one with the same major version"""
+    exact = DRIVER_CACHE_DIR / version / DRIVER_NAME
+    if exact.is_file():
+        return exact
+    major = version.split(".")[0]
+    same_major = sorted((d for d in DRIVER_CACHE_DIR.glob(f"{major}.*") if (d / DRIVER_NAME).is_file()),
+                        key=lambda d: [int(p) for p in d.name.split(".") if p.isdigit()])
+    return same_major[-1] / DRIVER_NAME if same_major else None
 
 def get_webdriver_path():
-    return EdgeChromiumDriverManager().install()
+    """
+    Resolve msedgedriver without touching the network when possible: an explicit
+    EDGE_DRIVER_PATH, then the local cache pinned to the installed Edge version,
+    and only then a download through webdriver-manager (skipped when
+    AUTODEV_OFFLINE is set), whose result is added to the cache.
+    """
+    global _resolved_driver_path
+    if _resolved_driver_path:
+        return _resolved_driver_path
+
+    explicit = os.environ.get("EDGE_DRIVER_PATH")
+    if explicit and Path(explicit).is_file():
+        _resolved_driver_path = explicit
+        return explicit
+
+    version = get_browser_version()
+    cached = _cached_driver(version) if version else None
+    if cached is None and not version and DRIVER_CACHE_DIR.is_dir():
+        candidates = sorted(DRIVER_CACHE_DIR.glob(f"*/{DRIVER_NAME}"), key=lambda p: p.stat().st_mtime)
+        cached = candidates[-1] if candidates else None
+    if cached is not None:
+        _resolved_driver_path = str(cached)
+        return _resolved_driver_path
+
+    if OFFLINE:
+        raise RuntimeError(f"No cached msedgedriver for Edge {version or '(unknown version)'} in {DRIVER_CACHE_DIR} "
+                           "and AUTODEV_OFFLINE is set. Copy a matching driver there or set EDGE_DRIVER_PATH.")
 
-def get_options():
+    downloaded = Path(EdgeChromiumDriverManager().install())
+    target_dir = DRIVER_CACHE_DIR / (version or downloaded.parent.name)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(downloaded, target_dir / DRIVER_NAME)
+    _resolved_driver_path = str(target_dir / DRIVER_NAME)
+    return _resolved_driver_path
+
+def get_options(profile="normal", viewport=None):
+    """
+    Edge options for a browser profile (see BROWSER_PROFILES). `viewport` is
+    an optional "width,height" for the initial headless window; suites can
+    still resize it with Set Window Size since headless windows are not
+    bounded by a physical screen.
+    """
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile '{profile}', expected one of {', '.join(BROWSER_PROFILES)}")
     options = webdriver.EdgeOptions()
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
@@ -14,5 +140,243 @@ def get_options():
     options.add_argument('--disable-infobars')
     options.add_argument('--ignore-certificate-errors')
     options.add_argument('--inprivate')
+    if profile != "normal":
+        options.add_argument('--headless=new')
+        options.add_argument(f'--window-size={viewport or DEFAULT_WINDOW_SIZE}')
+    if profile == "fast":
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--disable-remote-fonts')
+        options.add_argument('--force-prefers-reduced-motion')
+        options.add_argument('--disable-smooth-scrolling')
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
     return options
+
+def apply_browser_profile(profile="normal"):
+    """
+    Page-level part of a profile that command-line switches cannot cover. For
+    `fast` it blocks image/font requests over CDP and injects a stylesheet
+    disabling CSS transitions and animations into every page loaded afterwards.
+    Call it right after the browser is opened.
+    """
+    if profile != "fast":
+        return
+    from robot.libraries.BuiltIn import BuiltIn
+    driver = BuiltIn().get_library_instance("SeleniumLibrary").driver
+    _apply_fast_profile(driver)
+
+def _apply_fast_profile(driver):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": FAST_BLOCKED_URLS})
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": NO_MOTION_SCRIPT})
+    driver.execute_script(NO_MOTION_SCRIPT)  # The page that is already open
+
+# --- Browser pool ---
+# A long-lived pool process (`python webdriver_setup.py pool ...`) keeps headless
+# sessions open and lists them in a JSON registry. Robot suites lease a session
+# with `Lease Pooled Browser`, reset it between tests and release it at teardown
+# instead of launching and quitting a browser per suite.
+
+def _pid_alive(pid):
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+class _RegistryLock:
+    """Cross-process lock on the pool registry using an exclusively created lock file"""
+
+    def __init__(self, registry_path):
+        self.lock_path = Path(str(registry_path) + ".lock")
+
+    def __enter__(self):
+        deadline = time.time() + POOL_LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                if time.time() > deadline:
+                    raise TimeoutError(f"Timed out waiting for browser pool lock {self.lock_path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        self.lock_path.unlink(missing_ok=True)
+
+def _read_registry(registry_path):
+    return json.loads(Path(registry_path).read_text(encoding="utf-8"))
+
+def _write_registry(registry_path, registry):
+    tmp_path = Path(str(registry_path) + ".tmp")
+    tmp_path.write_text(json.dumps(registry, indent=2), encoding="utf-8")
+    os.replace(tmp_path, registry_path)
+
+class _AttachedRemote(webdriver.Remote):
+    """
+    Remote WebDriver bound to an existing Edge session instead of creating
+    one. It talks through a Chromium connection so CDP commands work, and
+    reports the capabilities the pool recorded when it created the session.
+    """
+
+    def __init__(self, executor, session_id, capabilities):
+        self._attach_session_id = session_id
+        self._attach_capabilities = capabilities
+        connection = ChromiumRemoteConnection(executor, vendor_prefix="ms", browser_name="MicrosoftEdge")
+        super().__init__(command_executor=connection, options=webdriver.EdgeOptions())
+
+    def start_session(self, capabilities, *args, **kwargs):
+        self.session_id = self._attach_session_id
+        self.caps = self._attach_capabilities
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+def _reset_driver(driver):
+    """Return a session to a clean state: one window, no cookies or storage, blank page"""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    try:
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except Exception:
+        pass  # No storage on about:blank or opaque origins
+    driver.delete_all_cookies()
+    driver.get("about:blank")
+
+def _try_lease(registry_path):
+    """(registry entry leased to this process or None, profile of the pool)"""
+    with _RegistryLock(registry_path):
+        registry = _read_registry(registry_path)
+        if not _pid_alive(registry["owner_pid"]):
+            return None, registry.get("profile", "headless")
+        entry = next((e for e in registry["sessions"]
+                      if not e.get("leased_by") or not _pid_alive(e["leased_by"])), None)
+        if entry is not None:
+            entry["leased_by"] = os.getpid()
+            _write_registry(registry_path, registry)
+        return entry, registry.get("profile", "headless")
+
+def lease_pooled_browser(registry_path, url=None, alias="pooled", wait=POOL_LEASE_WAIT):
+    """
+    Lease a free pooled browser, register it with SeleniumLibrary and
+    optionally open `url`. When every pooled browser stays leased for `wait`
+    seconds (more shards or suites than BROWSER_POOL_SIZE), or the pool is
+    gone, a local browser with the pool's profile is launched instead and
+    quit again on release.
+    """
+    global _leased
+    from robot.libraries.BuiltIn import BuiltIn
+    from robot.api import logger
+
+    if _leased:
+        raise RuntimeError("This process already holds a pooled browser")
+    deadline = time.time() + wait
+    while True:
+        try:
+            entry, profile = _try_lease(registry_path)
+        except FileNotFoundError:
+            entry, profile = None, "headless"  # Pool stopped and removed its registry
+            break
+        if entry is not None or time.time() > deadline:
+            break
+        time.sleep(0.5)
+
+    if entry is None:
+        logger.warn(f"No pooled browser free after {wait}s; launching a local {profile} browser")
+        driver = webdriver.Edge(service=Service(executable_path=get_webdriver_path()), options=get_options(profile))
+        if profile == "fast":
+            _apply_fast_profile(driver)
+        _leased = (None, None, driver)
+    else:
+        driver = _AttachedRemote(entry["executor"], entry["session_id"], entry.get("capabilities") or {})
+        _leased = (registry_path, entry["id"], driver)
+        _reset_driver(driver)
+    BuiltIn().get_library_instance("SeleniumLibrary").register_driver(driver, alias)
+    if url:
+        driver.get(url)
+
+def reset_pooled_browser():
+    """Clean the leased browser between tests; does nothing when no browser is leased"""
+    if _leased:
+        _reset_driver(_leased[2])
+
+def release_pooled_browser():
+    """Reset the leased browser and hand it back to the pool without quitting it"""
+    global _leased
+    if not _leased:
+        return
+    registry_path, entry_id, driver = _leased
+    _leased = None
+    if registry_path is None:
+        driver.quit()  # Local fallback browser
+        return
+    try:
+        _reset_driver(driver)
+    finally:
+        with _RegistryLock(registry_path):
+            registry = _read_registry(registry_path)
+            for entry in registry["sessions"]:
+                if entry["id"] == entry_id:
+                    entry["leased_by"] = None
+            _write_registry(registry_path, registry)
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _run_pool(size, registry_path, profile="headless"):
+    """Launch `size` headless sessions, publish them in the registry and keep them alive"""
+    driver_path = get_webdriver_path()
+    drivers, sessions = [], []
+    registry_path = Path(registry_path)
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def stop(*_):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        for i in range(size):
+            # webdriver.Edge (not a plain Remote) so the connection knows Edge's CDP commands
+            driver = webdriver.Edge(service=Service(executable_path=driver_path, port=_free_port()),
+                                    options=get_options(profile))
+            drivers.append(driver)
+            if profile == "fast":
+                _apply_fast_profile(driver)
+            sessions.append({"id": i, "executor": driver.service.service_url, "session_id": driver.session_id,
+                             "capabilities": driver.capabilities, "leased_by": None})
+        with _RegistryLock(registry_path):
+            _write_registry(registry_path, {"owner_pid": os.getpid(), "profile": profile, "sessions": sessions})
+        while True:
+            time.sleep(1)
+    finally:
+        registry_path.unlink(missing_ok=True)
+        for driver in drivers:
+            try:
+                driver.quit()  # Also stops its msedgedriver service
+            except Exception:
+                pass
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="WebDriver helpers for the Robot suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pool_parser = subparsers.add_parser("pool", help="Run a pool of pre-launched headless browsers")
+    pool_parser.add_argument("--size", type=int, default=2)
+    pool_parser.add_argument("--registry", required=True)
+    pool_parser.add_argument("--profile", choices=[p for p in BROWSER_PROFILES if p != "normal"], default="headless")
+    subparsers.add_parser("resolve", help="Print the resolved msedgedriver path")
+    args = parser.parse_args()
+    if args.command == "pool":
+        _run_pool(args.size, args.registry, args.profile)
+    else:
+        print(get_webdriver_path())
@@ -0,0 +1,63 @@
+"""commit_and_push against a local bare repository standing in for origin"""
+import subprocess
+import pytest
+import git_operations
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+def clone(remote, path):
+    subprocess.run(["git", "clone", "-q", str(remote), str(path)], check=True)
+    git(path, "config", "user.name", "Test")
+    git(path, "config", "user.email", "test@example.com")
+    return path
+
+@pytest.fixture
+def origin(tmp_path):
+    remote = tmp_path / "origin.git"
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "main", str(remote)], check=True)
+    seed = clone(remote, tmp_path / "seed")
+    (seed / "README").write_text("seed\n")
+    git(seed, "add", "README")
+    git(seed, "commit", "-q", "-m", "seed")
+    git(seed, "push", "-q", "origin", "main")
+    return remote
+
+def commit_and_push_file(repo, name, fetched):
+    (repo / name).write_text(f"{name}\n")
+    git_operations.stage_paths(repo, [name])
+    return git_operations.commit_and_push(repo, f"add {name}", fetched=fetched)
+
+@pytest.mark.parametrize("fetched", [False, True])
+def test_remote_unchanged_skips_pull(origin, tmp_path, fetched):
+    local = clone(origin, tmp_path / "local")
+    if fetched:
+        git(local, "fetch", "-q", "origin")
+    success, message, job = commit_and_push_file(local, "a.txt", fetched)
+    assert success, message
+    assert "unchanged, pull skipped" in message
+    assert job is None
+    assert git(origin, "rev-parse", "main") == git(local, "rev-parse", "HEAD")
+
+@pytest.mark.parametrize("fetched", [False, True])
+def test_remote_moved_is_merged_before_push(origin, tmp_path, fetched):
+    local = clone(origin, tmp_path / "local")
+    other = clone(origin, tmp_path / "other")
+    (other / "b.txt").write_text("b\n")
+    git(other, "add", "b.txt")
+    git(other, "commit", "-q", "-m", "add b")
+    git(other, "push", "-q", "origin", "main")
+    if fetched:
+        git(local, "fetch", "-q", "origin")
+
+    success, message, job = commit_and_push_file(local, "a.txt", fetched)
+    assert success, message
+    assert "merged origin/main" in message
+    assert git(origin, "rev-parse", "main") == git(local, "rev-parse", "HEAD")
+    assert set(git(origin, "ls-tree", "--name-only", "main").split()) == {"README", "a.txt", "b.txt"}
+
+def test_nothing_to_commit_returns_no_job(origin, tmp_path):
+    local = clone(origin, tmp_path / "local")
+    success, message, job = git_operations.commit_and_push(local, "nothing")
+    assert success and message.startswith("No changes to commit")
+    assert job is None
@@ -0,0 +1,206 @@
+"""
+Lightweight OpenTelemetry-style spans for one chat turn or run.
+
+    with span("run myapp", port=8081):         # No span active: starts a trace
+        with span("git push", ref="main"):     # Nested through contextvars
+            ...
+
+A trace is written when its root span ends, as Chrome trace-event JSON under
+.autodev/traces; chrome://tracing, ui.perfetto.dev and speedscope open it.
+Spans started while no trace is active are recorded only when `root=True`, so
+helpers can be instrumented without producing a trace per git command.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import AUTODEV_STATE_DIR, TRACES_KEPT
+
+TRACE_DIR = AUTODEV_STATE_DIR / "traces"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = f"{time.time_ns():x}"
+        self.spans = []
+        self._lock = threading.Lock()  # Pipeline steps add spans from pool threads
+
+    def add(self, new_span):
+        with self._lock:
+            self.spans.append(new_span)
+
+class Span:
+    def __init__(self, name, trace, parent=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.span_id = next(_span_ids)
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start = time.time()
+        self.end_time = None
+        self.thread = threading.current_thread().name
+        self._token = None
+        trace.add(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.status = "error"
+        self.attributes["error"] = str(message)[:500]
+
+    def end(self):
+        """End the span (idempotent); ending a root also closes its open children and writes the trace"""
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                _current_span.set(self.parent)  # Ended from another context than it was started in
+        if self.parent is None:
+            for child in self.trace.spans:
+                if child.end_time is None:
+                    child.status = "unfinished"
+                    child.end_time = self.end_time
+            export_trace(self.trace)
+
+def start_span(name, root=False, **attributes):
+    """
+    Start a span as a child of the current one and make it current. With no
+    current span it starts a new trace when `root` is set and otherwise
+    returns None. Call `.end()` on the result.
+    """
+    parent = _current_span.get()
+    if parent is None or parent.end_time is not None:
+        if not root:
+            return None
+        new_span = Span(name, Trace(name), attributes=attributes)
+    else:
+        new_span = Span(name, parent.trace, parent, attributes)
+    new_span._token = _current_span.set(new_span)
+    return new_span
+
+@contextmanager
+def span(name, root=False, **attributes):
+    """Context manager form of start_span; yields the span (or None) and marks it failed on exceptions"""
+    current = start_span(name, root=root, **attributes)
+    try:
+        yield current
+    except Exception as e:  # Streamlit's rerun/stop are BaseExceptions and end the span normally
+        if current is not None:
+            current.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        if current is not None:
+            current.end()
+
+def traced(name=None, root=False):
+    """Decorator running the function inside a span named after it"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__, root=root):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span():
+    return _current_span.get()
+
+def copy_context():
+    """Context to run pool work in (`executor.submit(ctx.run, fn)`) so its spans nest under the current one"""
+    return contextvars.copy_context()
+
+def to_chrome_trace(trace):
+    """Chrome trace-event format: one complete ("X") event per span, threads named"""
+    pid = os.getpid()
+    thread_ids = {}
+    events = []
+    for s in trace.spans:
+        tid = thread_ids.setdefault(s.thread, len(thread_ids) + 1)
+        args = {"span_id": s.span_id, "parent_id": s.parent.span_id if s.parent else None, "status": s.status}
+        args.update({k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v)
+                     for k, v in s.attributes.items()})
+        events.append({"name": s.name, "cat": "error" if s.status == "error" else "span", "ph": "X",
+                       "ts": int(s.start * 1e6), "dur": int(((s.end_time or s.start) - s.start) * 1e6),
+                       "pid": pid, "tid": tid, "args": args})
+    for thread_name, tid in thread_ids.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+    return {"traceEvents": events, "displayTimeUnit": "ms",
+            "otherData": {"trace": trace.name, "trace_id": trace.trace_id}}
+
+def export_trace(trace, kept=TRACES_KEPT):
+    """Write the trace JSON and keep only the newest `kept` files; returns the path"""
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    slug = "".join(c if c.isalnum() else "-" for c in trace.name.lower()).strip("-")
+    path = TRACE_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{slug}-{trace.trace_id[-6:]}.json"
+    try:
+        path.write_text(json.dumps(to_chrome_trace(trace)), encoding="utf-8")
+    except OSError:
+        return None  # Tracing must never break the traced work
+    for old in sorted(TRACE_DIR.glob("*.json"))[:-kept]:
+        old.unlink(missing_ok=True)
+    return path
+
+def latest_trace(name=None):
+    """(path, trace JSON) of the newest trace, optionally only traces whose root is `name`; (None, None) if none"""
+    slug = "".join(c if c.isalnum() else "-" for c in name.lower()).strip("-") if name else ""
+    for path in sorted(TRACE_DIR.glob("*.json"), reverse=True):
+        if slug and f"-{slug}-" not in path.name:
+            continue
+        try:
+            return path, json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+    return None, None
+
+def waterfall_rows(trace_json):
+    """Spans as rows for a waterfall chart: start/end in ms from the root, depth-indented labels, in start order"""
+    spans = [e for e in trace_json["traceEvents"] if e["ph"] == "X"]
+    if not spans:
+        return []
+    origin = min(e["ts"] for e in spans)
+    parents = {e["args"]["span_id"]: e["args"]["parent_id"] for e in spans}
+
+    def depth(span_id):
+        level = 0
+        while parents.get(span_id):
+            span_id = parents[span_id]
+            level += 1
+        return level
+
+    rows = []
+    for index, e in enumerate(sorted(spans, key=lambda e: e["ts"])):
+        rows.append({
+            "span": f"{index + 1:02d} " + "  " * depth(e["args"]["span_id"]) + e["name"],
+            "start": (e["ts"] - origin) / 1000,
+            "end": (e["ts"] + e["dur"] - origin) / 1000,
+            "duration_ms": round(e["dur"] / 1000, 1),
+            "status": e["args"]["status"],
+            "thread": str(e["tid"]),
+        })
+    return rows
+
+def waterfall_chart(trace_json):
+    """Altair waterfall (one bar per span on a shared time axis) for st.altair_chart"""
+    import altair as alt  # Ships with Streamlit
+    rows = waterfall_rows(trace_json)
+    return alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X("start:Q", title="ms since start"),
+        x2="end:Q",
+        y=alt.Y("span:N", sort=None, title=None, axis=alt.Axis(labelLimit=400)),
+        color=alt.Color("status:N", scale=alt.Scale(domain=["ok", "error", "unfinished"],
+                                                    range=["#4c78a8", "#e45756", "#bab0ac"])),
+        tooltip=["span:N", "duration_ms:Q", "status:N", "thread:N"],
+    ).properties(height=max(120, 22 * len(rows)))
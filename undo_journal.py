@@ -0,0 +1,158 @@
+"""
+Undo for applied changes without git. When a write succeeded, the old
+contents of the file go into a content-addressed store (zlib-compressed, one
+object per distinct content, so unchanged files cost nothing twice), and the
+turn's journal records which object each path had before and the hash of
+what was written. Undoing a turn writes the old objects back (or deletes
+files the turn created), but only for files that still hold what the turn
+wrote, unless forced.
+
+    .autodev/undo/objects/ab/abcdef...   compressed file contents by SHA-256
+    .autodev/undo/journals/<turn>.json   {"turn", "time", "label", "files": [{"path", "sha", "after"}]}
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from config import AUTODEV_STATE_DIR, UNDO_STORE_MAX_MB
+
+UNDO_DIR = AUTODEV_STATE_DIR / "undo"
+OBJECTS_DIR = UNDO_DIR / "objects"
+JOURNALS_DIR = UNDO_DIR / "journals"
+
+# Journals are read-modify-written; sessions of this server share the store
+_journal_lock = threading.Lock()
+
+def _write_atomically(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    if path.exists():
+        shutil.copymode(path, temp)
+    else:
+        os.chmod(temp, 0o644)  # mkstemp files are owner-only
+    os.replace(temp, path)
+
+def new_turn_id():
+    return f"{time.time_ns():x}"
+
+def _object_path(sha):
+    return OBJECTS_DIR / sha[:2] / sha
+
+def store_object(data):
+    """Store bytes once under their SHA-256; returns the sha"""
+    sha = hashlib.sha256(data).hexdigest()
+    path = _object_path(sha)
+    if not path.exists():
+        _write_atomically(path, zlib.compress(data, 6))
+    return sha
+
+def load_object(sha):
+    return zlib.decompress(_object_path(sha).read_bytes())
+
+def _journal_path(turn):
+    return JOURNALS_DIR / f"{turn}.json"
+
+def load_journal(turn):
+    try:
+        return json.loads(_journal_path(turn).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+def has_journal(turn):
+    return _journal_path(turn).exists()
+
+def _current_sha(path):
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def record_changes(changes, turn, label=""):
+    """
+    Journal writes that succeeded in chat turn `turn`. `changes` is
+    [(path, bytes before the write or None for a new file)]; the written
+    contents are hashed from disk. A path written again in the same turn
+    keeps its first "before", so undo goes back to the state before the turn.
+    """
+    with _journal_lock:
+        journal = load_journal(turn) or {"turn": turn, "time": time.time(), "label": label, "files": []}
+        entries = {entry["path"]: entry for entry in journal["files"]}
+        for path, before in changes:
+            path = str(Path(path).resolve())
+            if path not in entries:
+                entries[path] = {"path": path, "sha": store_object(before) if before is not None else None}
+                journal["files"].append(entries[path])
+            entries[path]["after"] = _current_sha(path)
+        _write_atomically(_journal_path(turn), json.dumps(journal).encode("utf-8"))
+    enforce_retention()
+
+def changed_since(turn):
+    """Paths of a turn that no longer hold what the turn wrote (edited later by hand or by another answer)"""
+    journal = load_journal(turn)
+    if journal is None:
+        return []
+    return [entry["path"] for entry in journal["files"] if _current_sha(entry["path"]) != entry.get("after")]
+
+def undo_turn(turn, force=False):
+    """
+    Restore every file of a turn to its recorded contents. Refuses when a
+    file changed after the turn wrote it, since that later edit would be
+    lost, unless `force` is set. Returns (success, message).
+    """
+    with _journal_lock:
+        journal = load_journal(turn)
+        if journal is None:
+            return False, "Nothing to undo for this turn."
+        if not force:
+            changed = [entry["path"] for entry in journal["files"] if _current_sha(entry["path"]) != entry.get("after")]
+            if changed:  # changed_since, without re-reading the journal
+                return False, ("Changed since this answer was applied, undoing would discard those edits: "
+                               + ", ".join(f"`{Path(path).name}`" for path in changed))
+        failed = []
+        for entry in reversed(journal["files"]):
+            path = Path(entry["path"])
+            try:
+                if entry["sha"] is None:
+                    path.unlink(missing_ok=True)
+                else:
+                    _write_atomically(path, load_object(entry["sha"]))
+            except (OSError, zlib.error) as e:
+                failed.append(f"{path.name}: {e}")
+        if failed:
+            return False, "Some files could not be restored: " + "; ".join(failed)
+        _journal_path(turn).unlink()
+    return True, f"Restored {len(journal['files'])} file(s)"
+
+def list_journals():
+    """Journals, newest first"""
+    journals = [load_journal(path.stem) for path in JOURNALS_DIR.glob("*.json")]
+    return sorted((j for j in journals if j), key=lambda j: j["time"], reverse=True)
+
+def enforce_retention(max_mb=UNDO_STORE_MAX_MB):
+    """
+    Keep the object store under `max_mb`: objects of undone or dropped turns
+    go first, then the oldest journals and the objects only they refer to.
+    """
+    if not OBJECTS_DIR.exists():
+        return
+    sizes = {path.name: path.stat().st_size for path in OBJECTS_DIR.glob("*/*") if not path.name.endswith(".tmp")}
+    total = sum(sizes.values())
+    if total <= max_mb * 1024 * 1024:
+        return
+    with _journal_lock:
+        journals = list_journals()
+        while True:
+            referenced = {entry["sha"] for journal in journals for entry in journal["files"]}
+            for sha in [sha for sha in sizes if sha not in referenced]:
+                _object_path(sha).unlink(missing_ok=True)
+                total -= sizes.pop(sha)
+            if total <= max_mb * 1024 * 1024 or not journals:
+                break
+            _journal_path(journals.pop()["turn"]).unlink(missing_ok=True)
@@ -0,0 +1,84 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+WORKTREE_DIR = Path(".autodev") / "worktrees"  # Relative to the main checkout; ignored by git
+BRANCH_PREFIX = "autodev/"
+
+# Merges into the main checkout are serialized across sessions of this server
+_merge_lock = threading.Lock()
+
+def _git(args, cwd):
+    """Run git and return (success, combined output)"""
+    try:
+        process = subprocess.run(['git'] + args, cwd=str(cwd), capture_output=True, text=True)
+    except FileNotFoundError:
+        return False, "git is not installed or not in PATH"
+    return process.returncode == 0, (process.stdout + process.stderr).strip()
+
+def worktree_path(repo_root, name):
+    return Path(repo_root) / WORKTREE_DIR / name
+
+def ensure_worktree(repo_root, name):
+    """
+    Return the worktree for `name` (a chat session), creating it from the
+    main checkout's HEAD on branch autodev/<name> if needed. Worktrees share
+    the main repository's object store, so this is a checkout, not a clone.
+    Returns (path or None, message).
+    """
+    path = worktree_path(repo_root, name)
+    if (path / ".git").exists():
+        os.utime(path)  # Marks the worktree as in use for prune_worktrees
+        return path, f"Using worktree {path}"
+
+    _git(['worktree', 'prune'], repo_root)  # Forget worktrees whose directories were deleted
+    branch = BRANCH_PREFIX + name
+    branch_exists, _ = _git(['rev-parse', '--verify', '--quiet', f'refs/heads/{branch}'], repo_root)
+    args = ['worktree', 'add', str(path), branch] if branch_exists else ['worktree', 'add', '-b', branch, str(path), 'HEAD']
+    start = time.time()
+    ok, output = _git(args, repo_root)
+    if not ok:
+        return None, f"Could not create worktree {path}: {output}"
+    return path, f"Created worktree {path} on {branch} in {time.time() - start:.2f}s"
+
+def merge_back(repo_root, worktree):
+    """
+    Fast-forward the main checkout's current branch to the worktree's HEAD
+    after its work was committed (and, normally, pushed). Returns (success, message).
+    """
+    with _merge_lock:
+        ok, head = _git(['rev-parse', 'HEAD'], worktree)
+        if not ok:
+            return False, head
+        ok, output = _git(['merge', '--ff-only', head], repo_root)
+        if not ok:
+            return False, f"Main checkout could not fast-forward to {head[:10]}: {output}"
+        return True, f"Main checkout fast-forwarded to {head[:10]}"
+
+def prune_worktrees(repo_root, max_age_hours, keep=()):
+    """
+    Remove idle worktrees with no uncommitted changes, untracked files
+    included (runs write their output to the main checkout, so an untracked
+    file here is work nobody committed); their branches stay for later reuse.
+    """
+    root = Path(repo_root) / WORKTREE_DIR
+    if not root.is_dir():
+        return []
+    removed = []
+    cutoff = time.time() - max_age_hours * 3600
+    for path in root.iterdir():
+        if path.name in keep or not path.is_dir() or path.stat().st_mtime > cutoff:
+            continue
+        ok, status = _git(['status', '--porcelain'], path)
+        if ok and not status:
+            ok, _ = _git(['worktree', 'remove', str(path)], repo_root)
+            if ok:
+                removed.append(path.name)
+        elif not (path / ".git").exists():
+            shutil.rmtree(path, ignore_errors=True)  # Leftover directory, not a worktree
+    if removed:
+        _git(['worktree', 'prune'], repo_root)
+    return removed